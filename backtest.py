@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from numpy.lib.stride_tricks import sliding_window_view
+
+from symbol_index import SymbolIndex
+from indicators import TREND_MA, compute_indicators, padded_matrix
+from trend_screener import SLOPE_WINDOW
+
+# Trading days between a signal and the close it is judged against; the dashboard
+# projects 10 days ahead
+HORIZON = 10
+# Closes in each projection fit and the polynomial degree, as in batch_projections
+LOOKBACK = 30
+DEGREE = 2
+# Symbols per parallel task
+CHUNK_SYMBOLS = 64
+SIGNALS = ('MA', 'Slope', 'Projection')
+
+
+def rolling_slopes(close, window):
+    # Least-squares slope against position of every full trailing window, as ols_slopes
+    # computes it for the last one: a fixed weight vector dotted with each window
+    slopes = np.full(close.shape, np.nan)
+    if close.shape[1] < window:
+        return slopes
+    x = np.arange(window) - (window - 1) / 2
+    slopes[:, window - 1:] = sliding_window_view(close, window, axis=1) @ (x / (x * x).sum())
+    return slopes
+
+
+def rolling_projections(close, days, lookback, horizon, degree):
+    # Polynomial fit of every full trailing `lookback` closes against calendar days,
+    # extrapolated `horizon` days past the window like batch_projections' final step
+    projected = np.full(close.shape, np.nan)
+    if close.shape[1] < lookback:
+        return projected
+    y = sliding_window_view(close, lookback, axis=1)
+    d = sliding_window_view(days, lookback, axis=1)
+    valid = ~np.isnan(y).any(axis=2) & ~np.isnan(d).any(axis=2)
+    y, d = y[valid], d[valid]
+
+    x = d - d[:, :1]
+    scale = np.maximum(x[:, -1], 1.0)
+    powers = np.arange(degree + 1)
+    design = (x / scale[:, None])[:, :, None] ** powers
+    # Normal equations of all windows solved as one batch
+    normal = np.einsum('wlp,wlq->wpq', design, design)
+    rhs = np.einsum('wlp,wl->wp', design, y)
+    coefs = np.linalg.solve(normal, rhs[:, :, None])[:, :, 0]
+
+    future = ((x[:, -1] + horizon) / scale)[:, None] ** powers
+    projected[:, lookback - 1:][valid] = (future * coefs).sum(axis=1)
+    return projected
+
+
+def _evaluate_chunk(close, days, ma, periods, n_periods, horizon, slope_window, lookback, degree):
+    # Every signal on every (symbol, day) of the chunk, judged by the close `horizon`
+    # trading days later; only data up to each day goes into its signal
+    future = np.full(close.shape, np.nan)
+    if close.shape[1] > horizon:
+        future[:, :-horizon] = close[:, horizon:]
+    projected = rolling_projections(close, days, lookback, horizon, degree)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        forward = (future / close - 1) * 100
+        error = (projected / future - 1) * 100
+    judged = np.isfinite(forward)
+    calls = {
+        'MA': np.sign(close - ma),
+        'Slope': np.sign(rolling_slopes(close, slope_window)),
+        'Projection': np.sign(projected - close),
+    }
+
+    cells = {'Days': judged, 'Up': judged & (forward > 0), 'Forward': np.where(judged, forward, 0)}
+    for name, call in calls.items():
+        made = judged & (np.nan_to_num(call) != 0)
+        cells[f'{name} Signals'] = made
+        cells[f'{name} Hits'] = made & (call == np.sign(forward))
+        cells[f'{name} Return'] = np.where(made, call * forward, 0)
+    fitted = judged & np.isfinite(error)
+    cells['Errors'] = fitted
+    cells['Absolute Error'] = np.where(fitted, np.abs(error), 0)
+    cells['Error'] = np.where(fitted, error, 0)
+
+    by_symbol = {name: values.sum(axis=1, dtype=np.float64) for name, values in cells.items()}
+    codes = periods[judged]
+    by_period = {
+        name: np.bincount(codes, weights=values[judged].astype(np.float64), minlength=n_periods)
+        for name, values in cells.items()
+    }
+    return by_symbol, by_period
+
+
+def _metrics(sums):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table = {
+            'Days': sums['Days'].astype(np.int64),
+            'Up %': sums['Up'] / sums['Days'] * 100,
+            'Forward Return %': sums['Forward'] / sums['Days'],
+        }
+        for name in SIGNALS:
+            signals = sums[f'{name} Signals']
+            table[f'{name} Signals'] = signals.astype(np.int64)
+            table[f'{name} Hit %'] = sums[f'{name} Hits'] / signals * 100
+            table[f'{name} Return %'] = sums[f'{name} Return'] / signals
+        table['Projection MAE %'] = sums['Absolute Error'] / sums['Errors']
+        table['Projection Bias %'] = sums['Error'] / sums['Errors']
+    return table
+
+
+def backtest_signals(df=None, symbol_index=None, indicators=None, horizon=HORIZON, slope_window=SLOPE_WINDOW,
+                     lookback=LOOKBACK, degree=DEGREE, n_jobs=-1, chunk_symbols=CHUNK_SYMBOLS):
+    # Walk-forward test of the trend tab's signals: the close vs TREND_MA, the 30-day
+    # slope and the polynomial projection, recomputed for every symbol on every day
+    # from trailing windows. Returns per-symbol results and the same metrics per month
+    # across all symbols. Hit % is how often the signal's direction matched the move
+    # over the next `horizon` trading days; Return % is that move taken in the signal's
+    # direction
+    if symbol_index is None:
+        symbol_index = SymbolIndex(df)
+    if indicators is None:
+        indicators = compute_indicators(symbol_index=symbol_index)
+    frame = symbol_index.frame
+
+    close, cells = padded_matrix(symbol_index, frame['ClosePrice'].to_numpy(dtype=np.float64))
+    dates = frame['Date'].to_numpy().astype('datetime64[D]')
+    days = padded_matrix(symbol_index, dates.astype(np.int64).astype(np.float64))[0]
+    ma = padded_matrix(symbol_index, indicators[TREND_MA].to_numpy(dtype=np.float64))[0]
+
+    months = dates.astype('datetime64[M]')
+    period_starts = np.unique(months)
+    periods = np.zeros(close.shape, dtype=np.int64)
+    periods[cells] = np.searchsorted(period_starts, months)
+
+    # Symbols are independent, so chunks of them run on separate cores
+    chunks = [slice(i, i + chunk_symbols) for i in range(0, max(len(close), 1), chunk_symbols)]
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_evaluate_chunk)(close[c], days[c], ma[c], periods[c], len(period_starts),
+                                 horizon, slope_window, lookback, degree)
+        for c in chunks
+    )
+
+    by_symbol = {name: np.concatenate([r[0][name] for r in results]) for name in results[0][0]}
+    by_period = {name: sum(r[1][name] for r in results) for name in results[0][1]}
+
+    summary = pd.DataFrame({'Symbol': np.array(symbol_index.symbols, dtype=object), **_metrics(by_symbol)})
+    period_table = pd.DataFrame({'Period': pd.to_datetime(period_starts), **_metrics(by_period)})
+    return summary, period_table[period_table['Days'] > 0].reset_index(drop=True)
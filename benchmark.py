@@ -0,0 +1,207 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import BASE_SYMBOLS, BASE_DAYS, write_market
+from cleaning_pipeline import run_pipeline
+from incremental_ingest import refresh_store
+from symbol_index import SymbolIndex
+from shared_dataset import add_derived_columns, read_only_stock
+from feature_store import compute_features
+from figure_render import render_figure
+from volatility_top_20 import calculate_volatility_plot
+from heatmap_by_sector import plot_stock_heatmap, plot_sector_heatmap
+from sector_engine import SectorEngine
+from daily_volatility_trend import plot_volatility_trend
+from closing_price_trend import plot_closing_price_trend
+from cluster_service import CLUSTER_FEATURES, ClusterSweep
+from correlation_engine import CorrelationEngine
+from correlation_stock_price import correlation_stock_price
+from rolling_correlation import rolling_against_index
+from market_relative import MarketRelative
+from individual_candle_stick import plot_candlestick
+from ohlc_resample import resample_ohlc
+from trend_screener import screen_trends
+from indicators import compute_indicators
+from backtest import backtest_signals
+from project_future_prices import batch_projections
+
+# Symbol x day multipliers of the base universe
+DEFAULT_SCALES = ['1x1', '10x1', '1x10']
+RESULTS_DIR = "benchmark_results"
+# Symbols drawn in the per-symbol charts
+SAMPLE_SYMBOLS = 5
+# Slowdown ratio reported as a regression when comparing runs
+REGRESSION_RATIO = 1.2
+
+
+def parse_scale(scale):
+    symbol_scale, day_scale = (int(part) for part in scale.lower().split('x'))
+    return symbol_scale, day_scale
+
+
+def measure(fn, repeat=1, memory=True):
+    # Best wall time of `repeat` runs, then one traced run for peak Python/NumPy allocations
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+
+        peak = None
+        if memory:
+            tracemalloc.start()
+            try:
+                fn()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return min(timings), peak
+
+
+def load_cases(stock_path, index_path, snapshot_dir):
+    def cold_load():
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        return refresh_store(stock_path, index_path, snapshot_dir)
+
+    return [
+        ('load_data.cold', cold_load),
+        ('load_data.snapshot', lambda: refresh_store(stock_path, index_path, snapshot_dir)),
+    ]
+
+
+def analytics_cases(df, index_df, symbol_index):
+    sample = symbol_index.symbols[:SAMPLE_SYMBOLS]
+    engine = SectorEngine(symbol_index=symbol_index)
+    return [
+        ('symbol_index', lambda: SymbolIndex(df)),
+        ('features', lambda: compute_features(symbol_index=symbol_index)),
+        ('volatility_top_20', lambda: render_figure(calculate_volatility_plot(df))),
+        ('sector_heatmap', lambda: plot_stock_heatmap(df)),
+        ('sector_engine', lambda: SectorEngine(symbol_index=symbol_index)),
+        ('sector_heatmap.range', lambda: plot_sector_heatmap(engine, engine.dates[0], engine.dates[-1])),
+        ('volatility_trend', lambda: render_figure(plot_volatility_trend(df, sample, symbol_index=symbol_index))),
+        ('volatility_trend.plotly', lambda: plot_volatility_trend(df, sample, symbol_index=symbol_index, backend='plotly')),
+        ('closing_price_trend', lambda: render_figure(plot_closing_price_trend(df, sample, symbol_index=symbol_index))),
+        ('cluster_sweep', lambda: ClusterSweep(df, CLUSTER_FEATURES)),
+        ('correlation_engine', lambda: CorrelationEngine(df)),
+        ('sector_correlation', lambda: render_figure(correlation_stock_price(df)[1])),
+        ('rolling_against_index', lambda: rolling_against_index(df, index_df, 60)),
+        ('market_relative', lambda: MarketRelative(df, index_df).table()),
+        ('candlestick', lambda: plot_candlestick(df, sample[0], symbol_index=symbol_index)),
+        ('ohlc_weekly', lambda: resample_ohlc(symbol_index=symbol_index, freq='W')),
+        ('trend_screener', lambda: screen_trends(symbol_index=symbol_index)),
+        ('indicators', lambda: compute_indicators(symbol_index=symbol_index)),
+        ('batch_projections', lambda: batch_projections(symbol_index=symbol_index)),
+        ('backtest', lambda: backtest_signals(symbol_index=symbol_index)),
+    ]
+
+
+def run_scale(scale, repeat=1, memory=True, seed=0):
+    symbol_scale, day_scale = parse_scale(scale)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        stock_path, index_path = write_market(directory, BASE_SYMBOLS * symbol_scale, BASE_DAYS * day_scale, seed)
+        snapshot_dir = os.path.join(directory, 'snapshot')
+
+        def record(case, seconds, peak, rows):
+            entry = {'scale': scale, 'case': case, 'rows': rows, 'seconds': seconds, 'peak_bytes': peak}
+            results.append(entry)
+            peak_text = f"{peak / 1e6:9.1f} MB" if peak is not None else ''
+            print(f"{scale:>6} {case:<26} {seconds * 1000:10.1f} ms {peak_text}")
+
+        # Per-stage timings of the cleaning pipeline, then peaks from a traced run
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, report = run_pipeline(stock_path)
+            traced = run_pipeline(stock_path, trace_memory=memory)[1] if memory else report
+        for entry, traced_entry in zip(report, traced):
+            record(f"pipeline.{entry['stage']}", entry['seconds'], traced_entry.get('peak_bytes'), entry['rows'])
+
+        for case, fn in load_cases(stock_path, index_path, snapshot_dir):
+            seconds, peak = measure(fn, repeat, memory)
+            record(case, seconds, peak, None)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            df, index_df, _ = refresh_store(stock_path, index_path, snapshot_dir)
+        # The same read-only layout the dashboard shares between sessions
+        df = read_only_stock(add_derived_columns(df))
+        symbol_index = SymbolIndex(df)
+
+        for case, fn in analytics_cases(df, index_df, symbol_index):
+            seconds, peak = measure(fn, repeat, memory)
+            record(case, seconds, peak, len(df))
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare_results(baseline, results, ratio=REGRESSION_RATIO):
+    # Cases at least `ratio` times slower than in the baseline run
+    before = {(r['scale'], r['case']): r['seconds'] for r in baseline['results']}
+    regressions = []
+    for r in results['results']:
+        old = before.get((r['scale'], r['case']))
+        if old and r['seconds'] / old >= ratio:
+            regressions.append((r['scale'], r['case'], old, r['seconds']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless NEPSE dashboard benchmarks on synthetic data")
+    parser.add_argument('--scales', nargs='+', default=DEFAULT_SCALES,
+                        help=f"SYMBOLSxDAYS multipliers of {BASE_SYMBOLS} symbols x {BASE_DAYS} days, e.g. 1x1 10x1 100x1 1x10")
+    parser.add_argument('--repeat', type=int, default=1, help="Timed runs per case; the best is kept")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced run that measures peak memory")
+    parser.add_argument('--output', help="Results JSON path (default: benchmark_results/benchmark-<timestamp>.json)")
+    parser.add_argument('--compare', help="Earlier results JSON to report regressions against")
+    args = parser.parse_args(argv)
+
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'base': {'symbols': BASE_SYMBOLS, 'days': BASE_DAYS},
+        'environment': environment(),
+        'results': [],
+    }
+    for scale in args.scales:
+        results['results'] += run_scale(scale, args.repeat, not args.no_memory)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results)
+        for scale, case, old, new in regressions:
+            print(f"REGRESSION {scale:>6} {case:<26} {old * 1000:10.1f} ms -> {new * 1000:10.1f} ms ({new / old:.2f}x)")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
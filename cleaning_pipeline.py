@@ -0,0 +1,237 @@
+import time
+import tracemalloc
+
+import pandas as pd
+
+from instrumentation import span
+from date_index import DateIndex
+
+COLUMN_NAMES = {
+    'S.No': 'SerialNo',
+    'Symbol': 'Symbol',
+    'Conf.': 'Confidence',
+    'Open': 'OpenPrice',
+    'High': 'HighPrice',
+    'Low': 'LowPrice',
+    'Close': 'ClosePrice',
+    'VWAP': 'VWAP',
+    'Vol': 'Volume',
+    'Prev. Close': 'PrevClosePrice',
+    'Turnover': 'Turnover',
+    'Trans.': 'Transactions',
+    'Diff': 'Difference',
+    'Range': 'RangeValue',
+    'Diff %': 'DiffPercent',
+    'Range %': 'RangePercent',
+    'VWAP %': 'VWAPPercent',
+    '120 Days': '120Days',
+    '180 Days': '180Days',
+    '52 Weeks High': 'High_52Weeks',
+    '52 Weeks Low': 'Low_52Weeks',
+    'LTP': 'LastTradedPrice',
+    'Close - LTP': 'CloseMinusLTP',
+    'Close - LTP %': 'CloseMinusLTPPercent',
+    'Date': 'Date'
+}
+
+NUMERIC_COLUMNS = [
+    'OpenPrice', 'HighPrice', 'LowPrice', 'ClosePrice', 'VWAP',
+    'Volume', 'PrevClosePrice', 'Turnover', 'Transactions',
+    'Difference', 'RangeValue', '120Days', '180Days',
+    'High_52Weeks', 'Low_52Weeks', 'LastTradedPrice'
+]
+
+DROPPED_COLUMNS = [
+    'LastTradedPrice', 'CloseMinusLTP', 'CloseMinusLTPPercent', 'Volume'
+]
+
+CORE_PRICE_COLUMNS = ['OpenPrice', 'ClosePrice', 'HighPrice', 'LowPrice', 'VWAP']
+
+FFILL_COLUMNS = ['OpenPrice', 'ClosePrice']
+
+# Columns filled with the symbol's own median, then the market median
+GROUP_MEDIAN_COLUMNS = ['120Days', '180Days', 'High_52Weeks']
+
+INDEX_START_DATE = '2024-03-04'
+
+INDEX_NUMERIC_COLUMNS = ['Index Value', 'Absolute Change', 'Percentage Change']
+
+
+# Rows per read_csv chunk; each chunk is parsed, filtered and typed before the next one
+# is read, so peak memory is the kept rows plus one raw chunk
+CHUNK_ROWS = 200_000
+
+RAW_NAMES = {new: raw for raw, new in COLUMN_NAMES.items()}
+
+# Export columns the pipeline drops are never read
+SKIPPED_RAW_COLUMNS = {RAW_NAMES[col] for col in DROPPED_COLUMNS}
+
+# Text columns; Date is parsed per chunk and Confidence is a grade, not a number
+TEXT_RAW_COLUMNS = {'Symbol': 'str', 'Date': 'str', 'Conf.': 'str'}
+
+# Explicit dtypes so no chunk is left to inference
+RAW_SCHEMA = {
+    raw: 'float64' for raw in COLUMN_NAMES
+    if raw != 'S.No' and raw not in TEXT_RAW_COLUMNS and raw not in SKIPPED_RAW_COLUMNS
+}
+RAW_SCHEMA.update(TEXT_RAW_COLUMNS)
+
+
+def _read_chunks(path, chunk_rows, typed):
+    dtype = RAW_SCHEMA if typed else TEXT_RAW_COLUMNS
+    if hasattr(path, 'seek'):
+        path.seek(0)
+    reader = pd.read_csv(path, usecols=lambda col: col not in SKIPPED_RAW_COLUMNS,
+                         dtype=dtype, chunksize=chunk_rows)
+    with reader:
+        for chunk in reader:
+            chunk['Date'] = pd.to_datetime(chunk['Date'], format='%Y_%m_%d', errors='coerce')
+            chunk = chunk.dropna(subset=['Date']).rename(columns=COLUMN_NAMES)
+            chunk = filter_stage(chunk)
+            if not typed:
+                # Only the columns coerce_stage would convert; the rest keep what read_csv inferred
+                numeric_cols = [c for c in NUMERIC_COLUMNS if c in chunk.columns]
+                chunk[numeric_cols] = chunk[numeric_cols].apply(pd.to_numeric, errors='coerce')
+            yield chunk
+
+
+def parse_stage(path, chunk_rows=CHUNK_ROWS):
+    # Streams the export in chunks; promoter and mutual-fund rows are dropped per chunk,
+    # so only the kept rows are ever concatenated
+    try:
+        chunks = list(_read_chunks(path, chunk_rows, typed=True))
+    except ValueError:
+        # A non-numeric cell in a float column: re-read untyped and coerce the numeric
+        # columns per chunk, as coerce_stage does
+        chunks = list(_read_chunks(path, chunk_rows, typed=False))
+    df = pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+    # As with a whole-file read, Confidence is numeric only when every grade is a number
+    if 'Confidence' in df.columns:
+        try:
+            df['Confidence'] = pd.to_numeric(df['Confidence'])
+        except (ValueError, TypeError):
+            pass
+    return df
+
+
+def filter_stage(df):
+    # Drop rows where Symbol ends with 'P' or 'PO' (promoter shares)
+    promoter = df['Symbol'].str.endswith(('P', 'PO'))
+    # Drop stocks whose Symbol ends with a number (mutual funds like BOKD86, EBLD86, etc.)
+    mutual_fund = df['Symbol'].str.contains(r'\d$', na=False)
+    return df[~promoter & ~mutual_fund]
+
+
+def coerce_stage(df):
+    # Drop first so only the columns we keep get converted
+    # (the streaming parse never reads them and already types the numeric columns)
+    dropped = [c for c in DROPPED_COLUMNS if c in df.columns]
+    if dropped:
+        df = df.drop(columns=dropped)
+    numeric_cols = [c for c in NUMERIC_COLUMNS if c in df.columns and not pd.api.types.is_numeric_dtype(df[c])]
+    if numeric_cols:
+        df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce')
+
+    # Drop rows with missing core prices
+    return df.dropna(subset=CORE_PRICE_COLUMNS)
+
+
+def impute_stage(df):
+    # One cythonized groupby for all columns instead of a Python lambda per symbol
+    group_medians = df.groupby('Symbol', observed=True)[GROUP_MEDIAN_COLUMNS].transform('median')
+    df[GROUP_MEDIAN_COLUMNS] = df[GROUP_MEDIAN_COLUMNS].fillna(group_medians)
+
+    # Global median fallback for symbols with no values at all
+    df[GROUP_MEDIAN_COLUMNS] = df[GROUP_MEDIAN_COLUMNS].fillna(df[GROUP_MEDIAN_COLUMNS].median())
+
+    # Missing transactions are treated as no trades
+    df['Transactions'] = df['Transactions'].fillna(0)
+    df['PrevClosePrice'] = df['PrevClosePrice'].fillna(df['PrevClosePrice'].median())
+    return df
+
+
+def ffill_stage(df):
+    df = df.sort_values(by=['Symbol', 'Date'])
+    df[FFILL_COLUMNS] = df.groupby('Symbol', observed=True)[FFILL_COLUMNS].ffill()
+    return df
+
+
+CLEANING_STAGES = [
+    ('parse', parse_stage),
+    ('filter', filter_stage),
+    ('coerce', coerce_stage),
+    ('impute', impute_stage),
+    ('ffill', ffill_stage),
+]
+
+
+def run_pipeline(data, stages=CLEANING_STAGES, trace_memory=False):
+    report = []
+    if trace_memory:
+        tracemalloc.start()
+
+    try:
+        for name, stage in stages:
+            if trace_memory:
+                tracemalloc.reset_peak()
+            start = time.perf_counter()
+            with span(f"stage.{name}") as record:
+                data = stage(data)
+                if record is not None:
+                    record['rows'] = len(data)
+            elapsed = time.perf_counter() - start
+
+            entry = {
+                'stage': name,
+                'seconds': elapsed,
+                'rows': len(data),
+                'frame_bytes': int(data.memory_usage(deep=True).sum())
+            }
+            if trace_memory:
+                entry['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            report.append(entry)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    return data, report
+
+
+def format_report(report):
+    lines = []
+    for entry in report:
+        line = f"{entry['stage']:<8} {entry['seconds'] * 1000:9.1f} ms {entry['rows']:>10} rows {entry['frame_bytes'] / 1e6:9.1f} MB"
+        if 'peak_bytes' in entry:
+            line += f" (peak {entry['peak_bytes'] / 1e6:.1f} MB)"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def missing_value_table(df):
+    missing_percent = df.isnull().mean() * 100
+    return pd.DataFrame({
+        'Column': missing_percent.index,
+        'Missing %': missing_percent.values
+    }).sort_values(by='Missing %', ascending=False).reset_index(drop=True)
+
+
+def clean_index_data(path, start_date=INDEX_START_DATE):
+    nepse_index_df = pd.read_csv(path)
+
+    nepse_index_df.rename(columns={'Date (AD)': 'Date'}, inplace=True)
+    nepse_index_df['Date'] = nepse_index_df['Date'].astype(str).str.strip()
+    nepse_index_df['Date'] = pd.to_datetime(nepse_index_df['Date'], format='mixed', errors='coerce')
+    nepse_index_df.dropna(subset=['Date'], inplace=True)
+    # Older rows of the export write the change as '0.19%'
+    for col in INDEX_NUMERIC_COLUMNS:
+        if col in nepse_index_df.columns:
+            values = nepse_index_df[col].astype(str).str.replace(',', '').str.rstrip('%')
+            nepse_index_df[col] = pd.to_numeric(values, errors='coerce')
+    nepse_index_df.sort_values('Date', inplace=True)
+    # Dates stay datetime64 so the index data can be sliced by date like the stock data
+    return DateIndex(nepse_index_df).rows(start=start_date).copy()
+
+
+def clean_stock_data(path, trace_memory=False):
+    nepse_combined_df, report = run_pipeline(path, trace_memory=trace_memory)
+    return nepse_combined_df, missing_value_table(nepse_combined_df), report
@@ -1,28 +1,37 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
 
 import streamlit as st
+from symbol_index import symbol_rows
+from figure_render import line_figure
+from downsample import DEFAULT_POINTS, downsample_frame, visible_rows
 
-def plot_closing_price_trend(nepse_combined_df, company_symbols=['BHL']):
+def plot_closing_price_trend(nepse_combined_df, company_symbols=['BHL'], symbol_index=None, backend='matplotlib',
+                             max_points=DEFAULT_POINTS, date_range=None):
     if isinstance(company_symbols, str):
         company_symbols = [company_symbols]
 
-    available_symbols = nepse_combined_df['Symbol'].unique()
-    valid_symbols = [s for s in company_symbols if s in available_symbols]
+    df_plot = visible_rows(symbol_rows(nepse_combined_df, company_symbols, symbol_index), date_range)
 
-    if not valid_symbols:
+    if df_plot.empty:
         st.warning("None of the selected symbols are available in the dataset.")
-        return
+        return None
 
-    df_plot = nepse_combined_df[nepse_combined_df['Symbol'].isin(valid_symbols)].copy()
+    # At most max_points per symbol whatever the history length
+    df_plot = downsample_frame(df_plot, 'ClosePrice', max_points, method='lttb')
     df_plot = df_plot.sort_values('Date')
 
-    plt.figure(figsize=(12, 6))
-    sns.lineplot(data=df_plot, x='Date', y='ClosePrice', hue='Symbol')
-    plt.title('Closing Price Trend')
-    plt.xlabel('Date')
-    plt.ylabel('Closing Price')
-    plt.grid(True)
-    plt.legend(title='Symbol')
-    plt.xticks(rotation=45)
-    st.pyplot(plt.gcf())
+    if backend == 'plotly':
+        return line_figure(df_plot, 'Date', 'ClosePrice', 'Symbol', 'Closing Price Trend', 'Date', 'Closing Price')
+
+    # Figure objects outside pyplot's global state are safe to build from concurrent sessions
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+    sns.lineplot(data=df_plot, x='Date', y='ClosePrice', hue='Symbol', estimator=None, errorbar=None, ax=ax)
+    ax.set_title('Closing Price Trend')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Closing Price')
+    ax.grid(True)
+    ax.legend(title='Symbol')
+    ax.tick_params(axis='x', labelrotation=45)
+    return fig
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.decomposition import PCA
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler
+
+# Cluster feature set to be used externally
+CLUSTER_FEATURES = (
+    'DiffPercent',
+    'RangePercent',
+    'VWAPPercent',
+    'Volatility',
+    'Transactions',
+    'ClosePrice'
+)
+K_RANGE = range(2, 11)
+# Past this many symbols full KMeans gets slow enough to switch to mini-batches
+MINIBATCH_THRESHOLD = 5000
+# Silhouette is O(n^2), so score a sample on large universes
+SILHOUETTE_SAMPLE = 5000
+RANDOM_STATE = 42
+
+
+def cluster_feature_table(df, feature_cols, use_std=False, features=None):
+    feature_cols = list(feature_cols)
+    # Per-symbol means (and close std) come from the feature table when it has them
+    if features is not None and all(f"{col}Mean" in features.columns for col in feature_cols):
+        df_cluster = features[['Symbol'] + [f"{col}Mean" for col in feature_cols]].copy()
+        df_cluster.columns = ['Symbol'] + feature_cols
+        if use_std and 'ClosePrice' in feature_cols:
+            df_cluster['CloseStd'] = features['ClosePriceStd'].to_numpy()
+            feature_cols = feature_cols + ['CloseStd']
+        return df_cluster.dropna().reset_index(drop=True), feature_cols
+
+    df_cluster = df.groupby('Symbol', observed=True)[feature_cols].mean().reset_index()
+
+    if use_std and 'ClosePrice' in feature_cols:
+        close_std = df.groupby('Symbol', observed=True)['ClosePrice'].std().rename('CloseStd')
+        df_cluster = df_cluster.merge(close_std, on='Symbol', how='left')
+        feature_cols = feature_cols + ['CloseStd']
+
+    return df_cluster.dropna().reset_index(drop=True), feature_cols
+
+
+def _fit_k(X, k, minibatch):
+    if minibatch:
+        model = MiniBatchKMeans(n_clusters=k, random_state=RANDOM_STATE, n_init='auto', batch_size=2048)
+    else:
+        model = KMeans(n_clusters=k, random_state=RANDOM_STATE, n_init='auto')
+    labels = model.fit_predict(X)
+
+    silhouette = np.nan
+    if 1 < len(np.unique(labels)) < len(X):
+        sample_size = min(len(X), SILHOUETTE_SAMPLE)
+        silhouette = silhouette_score(X, labels, sample_size=sample_size, random_state=RANDOM_STATE)
+    return k, labels, model.inertia_, silhouette
+
+
+class ClusterSweep:
+    # Scaled features, 2-D PCA projection and a fitted model per k, computed once so
+    # changing k is a lookup
+
+    def __init__(self, df, feature_cols, use_std=False, k_values=K_RANGE, n_jobs=-1, minibatch=None, features=None):
+        self.table, self.feature_cols = cluster_feature_table(df, feature_cols, use_std, features=features)
+        self.minibatch = len(self.table) > MINIBATCH_THRESHOLD if minibatch is None else minibatch
+
+        X = self.table[self.feature_cols].to_numpy(dtype=np.float64)
+        # A 2-D projection (and any clustering) needs at least two symbols
+        if len(X) >= 2:
+            X = StandardScaler().fit_transform(X)
+            pcs = PCA(n_components=2).fit_transform(X)
+        else:
+            pcs = np.full((len(X), 2), np.nan)
+        self.table['PC1'], self.table['PC2'] = pcs[:, 0], pcs[:, 1]
+
+        k_values = [k for k in k_values if k <= len(X)]
+        fits = Parallel(n_jobs=n_jobs)(delayed(_fit_k)(X, k, self.minibatch) for k in k_values)
+
+        self.labels = {k: labels for k, labels, _, _ in fits}
+        self.scores = pd.DataFrame(
+            [(k, inertia, silhouette) for k, _, inertia, silhouette in fits],
+            columns=['k', 'Inertia', 'Silhouette']
+        ).set_index('k')
+
+    @property
+    def recommended_k(self):
+        # Highest silhouette; ties and all-NaN fall back to the smallest k, and None
+        # when no k could be fitted
+        if self.scores.empty:
+            return None
+        if self.scores['Silhouette'].notna().any():
+            return int(self.scores['Silhouette'].idxmax())
+        return int(self.scores.index.min())
+
+    def clusters(self, k):
+        df_cluster = self.table.copy()
+        df_cluster['Cluster'] = self.labels[k]
+        return df_cluster
+
+    def to_frames(self):
+        # The table with one Cluster_<k> label column per fitted k, and the scores
+        table = self.table.copy()
+        for k, labels in self.labels.items():
+            table[f'Cluster_{k}'] = labels
+        return table, self.scores.reset_index()
+
+    @classmethod
+    def from_frames(cls, table, scores):
+        sweep = cls.__new__(cls)
+        label_cols = [c for c in table.columns if c.startswith('Cluster_')]
+        sweep.table = table.drop(columns=label_cols).reset_index(drop=True)
+        sweep.feature_cols = [c for c in sweep.table.columns if c not in ('Symbol', 'PC1', 'PC2')]
+        sweep.minibatch = len(sweep.table) > MINIBATCH_THRESHOLD
+        sweep.labels = {int(c.split('_', 1)[1]): table[c].to_numpy() for c in label_cols}
+        sweep.scores = scores.set_index('k')
+        return sweep
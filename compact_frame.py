@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from symbol_to_group import symbol_to_group
+
+# Row counter from the export, nothing reads it after cleaning
+DEAD_COLUMNS = ['SerialNo']
+
+CATEGORY_COLUMNS = ['Symbol', 'Confidence']
+
+PRICE_COLUMNS = [
+    'OpenPrice', 'HighPrice', 'LowPrice', 'ClosePrice', 'VWAP', 'PrevClosePrice',
+    'Difference', 'RangeValue', 'DiffPercent', 'RangePercent', 'VWAPPercent',
+    '120Days', '180Days', 'High_52Weeks', 'Low_52Weeks', 'Turnover'
+]
+
+COUNT_COLUMNS = ['Transactions']
+
+
+def compact_frame(df):
+    df = df.drop(columns=[c for c in DEAD_COLUMNS if c in df.columns])
+
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype('category')
+
+    # Sector lookups become a 1-byte code per row instead of a dict map on every call
+    df['Group'] = df['Symbol'].astype(str).map(symbol_to_group).astype('category')
+
+    for col in PRICE_COLUMNS:
+        if col in df.columns and pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype(np.float32)
+
+    for col in COUNT_COLUMNS:
+        # Stays float if any value is missing or fractional; int32 so sums and products don't overflow
+        if col in df.columns and df[col].notna().all() and (df[col] % 1 == 0).all():
+            df[col] = df[col].astype(np.int32)
+
+    return df
+
+
+def memory_report(before, after):
+    before_bytes = before.memory_usage(deep=True, index=False)
+    after_bytes = after.memory_usage(deep=True, index=False)
+
+    columns = list(before.columns) + [c for c in after.columns if c not in before.columns]
+    report = pd.DataFrame({
+        'Before (bytes)': before_bytes,
+        'After (bytes)': after_bytes
+    }).reindex(columns)
+    report['Before dtype'] = before.dtypes.astype(str)
+    report['After dtype'] = after.dtypes.astype(str)
+    report.loc['Total'] = [before_bytes.sum(), after_bytes.sum(), '', '']
+    report['Saved %'] = (1 - report['After (bytes)'] / report['Before (bytes)']) * 100
+    return report.rename_axis('Column').reset_index()
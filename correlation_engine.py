@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+MIN_OVERLAP = 20
+BLOCK_SIZE = 256
+
+
+def daily_return_matrix(df, price_col='ClosePrice'):
+    # Dense date x symbol matrix of close-to-close returns. Each return is measured
+    # against the symbol's previous traded day, so a gap doesn't wipe out two days
+    df = df.sort_values(['Symbol', 'Date'], kind='stable')
+    symbol_codes, symbols = pd.factorize(df['Symbol'], sort=True)
+    date_codes, dates = pd.factorize(df['Date'], sort=True)
+    prices = df[price_col].to_numpy(dtype=np.float64)
+
+    returns = np.full(len(prices), np.nan)
+    same_symbol = symbol_codes[1:] == symbol_codes[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns[1:] = np.where(same_symbol, prices[1:] / prices[:-1] - 1, np.nan)
+    returns[~np.isfinite(returns)] = np.nan
+
+    matrix = np.full((len(dates), len(symbols)), np.nan)
+    matrix[date_codes, symbol_codes] = returns
+    return matrix, pd.DatetimeIndex(dates), pd.Index(symbols).astype(str)
+
+
+def previous_trade_codes(df):
+    # Same date x symbol layout as daily_return_matrix: the date position of each
+    # symbol's previous traded day, which is where that day's return starts; -1 where
+    # there is none
+    df = df.sort_values(['Symbol', 'Date'], kind='stable')
+    symbol_codes, symbols = pd.factorize(df['Symbol'], sort=True)
+    date_codes, dates = pd.factorize(df['Date'], sort=True)
+
+    previous = np.full((len(dates), len(symbols)), -1, dtype=np.int64)
+    same_symbol = symbol_codes[1:] == symbol_codes[:-1]
+    previous[date_codes[1:][same_symbol], symbol_codes[1:][same_symbol]] = date_codes[:-1][same_symbol]
+    return previous
+
+
+class CorrelationEngine:
+    # Pairwise-complete Pearson correlation of daily returns, computed block-wise from
+    # matrix products so queries never need the full N x N matrix in memory
+
+    def __init__(self, df, min_overlap=MIN_OVERLAP, block_size=BLOCK_SIZE, returns=None, matrix=None):
+        # A precomputed return matrix (dates x symbols) and correlation matrix can be
+        # passed instead of the frame
+        if returns is None:
+            returns, self.dates, self.symbols = daily_return_matrix(df)
+        else:
+            returns, self.dates, self.symbols = returns.to_numpy(dtype=np.float64), pd.DatetimeIndex(returns.index), pd.Index(returns.columns).astype(str)
+        self.min_overlap = min_overlap
+        self.block_size = block_size
+        self._positions = {s: i for i, s in enumerate(self.symbols)}
+
+        self._valid = (~np.isnan(returns)).astype(np.float64)
+        self._x = np.nan_to_num(returns)
+        self._x2 = self._x * self._x
+        self._matrix = matrix
+
+    def _corr_rows(self, rows):
+        # Correlation of the given symbols (rows) against every symbol, using only the
+        # dates where both sides traded
+        m, x, x2 = self._valid, self._x, self._x2
+        mr, xr, x2r = m[:, rows], x[:, rows], x2[:, rows]
+
+        n = mr.T @ m
+        sum_r = xr.T @ m
+        sum_c = mr.T @ x
+        sum_rr = x2r.T @ m
+        sum_cc = mr.T @ x2
+        sum_rc = xr.T @ x
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = n * sum_rc - sum_r * sum_c
+            var_r = n * sum_rr - sum_r ** 2
+            var_c = n * sum_cc - sum_c ** 2
+            corr = cov / np.sqrt(var_r * var_c)
+
+        corr[(n < self.min_overlap) | ~np.isfinite(corr)] = np.nan
+        return np.clip(corr, -1, 1)
+
+    def _blocks(self):
+        # Slices of the full matrix once it exists, otherwise computed block by block
+        for start in range(0, len(self.symbols), self.block_size):
+            rows = np.arange(start, min(start + self.block_size, len(self.symbols)))
+            if self._matrix is not None:
+                yield rows, self._matrix.to_numpy()[rows]
+            else:
+                yield rows, self._corr_rows(rows)
+
+    def return_frame(self):
+        returns = np.where(self._valid > 0, self._x, np.nan)
+        return pd.DataFrame(returns, index=self.dates, columns=self.symbols)
+
+    def correlation_matrix(self):
+        if self._matrix is None:
+            matrix = np.vstack([block for _, block in self._blocks()]) if len(self.symbols) else np.empty((0, 0))
+            self._matrix = pd.DataFrame(matrix, index=self.symbols, columns=self.symbols)
+        return self._matrix
+
+    def top_k(self, symbol, k=10):
+        if symbol not in self._positions:
+            return pd.DataFrame(columns=['Symbol', 'Correlation', 'OverlapDays'])
+
+        j = self._positions[symbol]
+        corr = self._matrix.to_numpy()[j].copy() if self._matrix is not None else self._corr_rows([j])[0]
+        overlap = self._valid[:, j] @ self._valid
+        corr[j] = np.nan
+
+        result = pd.DataFrame({'Symbol': self.symbols, 'Correlation': corr, 'OverlapDays': overlap.astype(int)})
+        return result.dropna(subset=['Correlation']).nlargest(k, 'Correlation').reset_index(drop=True)
+
+    def pairs_above(self, threshold=0.8, absolute=False):
+        found = []
+        for rows, block in self._blocks():
+            values = np.abs(block) if absolute else block
+            # Upper triangle only, each pair once
+            r, c = np.nonzero((values >= threshold) & (rows[:, None] < np.arange(len(self.symbols))[None, :]))
+            found.append((rows[r], c, block[r, c]))
+
+        if not found:
+            return pd.DataFrame(columns=['Symbol A', 'Symbol B', 'Correlation'])
+        a, b, corr = (np.concatenate(parts) for parts in zip(*found))
+        pairs = pd.DataFrame({'Symbol A': self.symbols[a], 'Symbol B': self.symbols[b], 'Correlation': corr})
+        return pairs.sort_values('Correlation', ascending=False, key=np.abs if absolute else None).reset_index(drop=True)
+
+    def sector_block_matrix(self, symbol_to_group):
+        groups = pd.Series(self.symbols.map(symbol_to_group), index=self.symbols)
+        group_codes, group_names = pd.factorize(groups, sort=True)
+        mapped = group_codes >= 0
+        one_hot = np.zeros((len(self.symbols), len(group_names)))
+        one_hot[np.flatnonzero(mapped), group_codes[mapped]] = 1
+
+        # Average correlation between every pair of sectors, self-pairs excluded
+        totals = np.zeros((len(group_names), len(group_names)))
+        counts = np.zeros_like(totals)
+        for rows, block in self._blocks():
+            block = block.copy()
+            block[np.arange(len(rows)), rows] = np.nan
+            valid = ~np.isnan(block)
+            totals += one_hot[rows].T @ np.where(valid, block, 0) @ one_hot
+            counts += one_hot[rows].T @ valid @ one_hot
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            averaged = totals / counts
+        return pd.DataFrame(averaged, index=group_names, columns=group_names)
@@ -1,14 +1,18 @@
-import pandas as pd
 import seaborn as sns
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from correlation_engine import CorrelationEngine
+from symbol_to_group import symbol_to_group
+
+def correlation_stock_price(df, engine=None, corr_matrix=None):
+    # Sector-averaged return correlations stay readable however many symbols there are
+    if corr_matrix is None:
+        if engine is None:
+            engine = CorrelationEngine(df)
+        corr_matrix = engine.sector_block_matrix(symbol_to_group)
+
+    fig = Figure(figsize=(12, 8))
+    ax = fig.subplots()
+    sns.heatmap(corr_matrix, cmap='coolwarm', center=0, ax=ax, annot=len(corr_matrix) <= 15, fmt='.2f')
+    ax.set_title('Sector-Averaged Daily Return Correlation')
 
-def correlation_stock_price(df):
-    pivot_df = df.pivot_table(index='Date', columns='Symbol', values='ClosePrice')
-    
-    corr_matrix = pivot_df.corr()
-    
-    fig, ax = plt.subplots(figsize=(12, 8))
-    sns.heatmap(corr_matrix, cmap='coolwarm', ax=ax, annot=False)
-    ax.set_title('Stock Closing Price Correlation Matrix')
-    
     return corr_matrix, fig
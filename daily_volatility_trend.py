@@ -1,27 +1,40 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
 import streamlit as st
+from symbol_index import symbol_rows
+from figure_render import line_figure
+from downsample import DEFAULT_POINTS, downsample_frame, visible_rows
+from shared_dataset import add_derived_columns
 
-def plot_volatility_trend(df, symbols):
-    if 'Volatility' not in df.columns:
-        df['Volatility'] = df['HighPrice'] - df['LowPrice']
-    
+def plot_volatility_trend(df, symbols, symbol_index=None, backend='matplotlib', max_points=DEFAULT_POINTS, date_range=None):
     if isinstance(symbols, str):
         symbols = [symbols]
 
-    filtered_df = df[df['Symbol'].isin(symbols)].sort_values(['Symbol', 'Date'])
+    filtered_df = visible_rows(symbol_rows(df, symbols, symbol_index), date_range)
 
     if filtered_df.empty:
         st.warning("⚠️ No data found for the given symbol(s).")
         return None
 
-    plt.figure(figsize=(14, 6))
-    sns.lineplot(data=filtered_df, x='Date', y='Volatility', hue='Symbol')
-    plt.title(f"Daily Volatility Trend - {', '.join(symbols)}")
-    plt.xlabel('Date')
-    plt.ylabel('Volatility (High - Low)')
-    plt.xticks(rotation=45)
-    plt.grid(True)
-    plt.tight_layout()
+    # Derived on the selected rows only; the shared frame is never written to
+    if 'Volatility' not in filtered_df.columns:
+        filtered_df = add_derived_columns(filtered_df)
 
-    return plt.gcf()
+    # Min/max buckets keep the volatility spikes that averaging would flatten
+    filtered_df = downsample_frame(filtered_df, 'Volatility', max_points, method='minmax')
+
+    title = f"Daily Volatility Trend - {', '.join(symbols)}"
+    if backend == 'plotly':
+        return line_figure(filtered_df, 'Date', 'Volatility', 'Symbol', title, 'Date', 'Volatility (High - Low)')
+
+    fig = Figure(figsize=(14, 6))
+    ax = fig.subplots()
+    sns.lineplot(data=filtered_df, x='Date', y='Volatility', hue='Symbol', estimator=None, errorbar=None, ax=ax)
+    ax.set_title(title)
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Volatility (High - Low)')
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid(True)
+    fig.tight_layout()
+
+    return fig
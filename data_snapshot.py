@@ -0,0 +1,181 @@
+import hashlib
+import io
+import json
+import os
+
+import pandas as pd
+
+SNAPSHOT_VERSION = 6
+SNAPSHOT_DIR = ".nepse_snapshot"
+SNAPSHOT_TABLES = ('stock', 'index', 'missing')
+MANIFEST_FILE = "manifest.json"
+
+
+def file_hash(path, chunk_size=1 << 20, limit=None):
+    # Hash the whole file, or only its first `limit` bytes
+    digest = hashlib.sha256()
+    remaining = limit
+    with open(path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path, size=None):
+    # Taken before the file is read, and the reader then stops at `size`, so bytes
+    # appended meanwhile are never marked as already ingested
+    stat = os.stat(path)
+    size = stat.st_size if size is None else size
+    return {
+        'path': os.path.abspath(path),
+        'size': size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': file_hash(path, limit=size)
+    }
+
+
+class _Prefix(io.RawIOBase):
+    def __init__(self, path, size):
+        self._file = open(path, 'rb')
+        self._size = size
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = min(len(buffer), self._size - self._file.tell())
+        if count <= 0:
+            return 0
+        return self._file.readinto(memoryview(buffer)[:count])
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_END:
+            offset, whence = self._size + offset, io.SEEK_SET
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def open_prefix(path, size):
+    # The file's first `size` bytes as a binary stream, whatever is appended while
+    # it is being read
+    return io.BufferedReader(_Prefix(path, size))
+
+
+def read_manifest(snapshot_dir=SNAPSHOT_DIR):
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get('version') != SNAPSHOT_VERSION:
+        return None
+    return manifest
+
+
+def source_matches(path, fingerprint):
+    if not os.path.exists(path):
+        return False
+    stat = os.stat(path)
+    if stat.st_size != fingerprint['size']:
+        return False
+    # Same size and mtime: trust the snapshot without rehashing the file
+    if stat.st_mtime_ns == fingerprint['mtime_ns']:
+        return True
+    # Touched but possibly unchanged (e.g. re-downloaded): fall back to the content hash
+    return file_hash(path) == fingerprint['sha256']
+
+
+def snapshot_is_fresh(source_paths, snapshot_dir=SNAPSHOT_DIR):
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        return False
+
+    sources = manifest.get('sources', [])
+    if [s['path'] for s in sources] != [os.path.abspath(p) for p in source_paths]:
+        return False
+
+    return all(source_matches(path, fp) for path, fp in zip(source_paths, sources))
+
+
+def load_table(name, snapshot_dir=SNAPSHOT_DIR):
+    try:
+        return pd.read_parquet(os.path.join(snapshot_dir, f"{name}.parquet"))
+    except (OSError, ValueError, ImportError):
+        return None
+
+
+def load_snapshot(source_paths, snapshot_dir=SNAPSHOT_DIR):
+    if not snapshot_is_fresh(source_paths, snapshot_dir):
+        return None
+
+    frames = tuple(load_table(name, snapshot_dir) for name in SNAPSHOT_TABLES)
+    if any(frame is None for frame in frames):
+        return None
+    return frames
+
+
+def save_snapshot(source_paths, frames, snapshot_dir=SNAPSHOT_DIR, extra_tables=None, metadata=None, fingerprints=None):
+    # fingerprints: the sources as they were when read (file_fingerprint before reading);
+    # taken now only when not given
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    # Invalidate first and write the manifest last, so a crash never leaves a
+    # manifest pointing at half-written tables
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    tables = dict(zip(SNAPSHOT_TABLES, frames))
+    tables.update(extra_tables or {})
+
+    try:
+        for name, frame in tables.items():
+            final_path = os.path.join(snapshot_dir, f"{name}.parquet")
+            tmp_path = final_path + ".tmp"
+            frame.to_parquet(tmp_path)
+            os.replace(tmp_path, final_path)
+    except (OSError, ValueError, TypeError, ImportError) as e:
+        print(f"Could not write dataset snapshot: {e}")
+        return False
+
+    manifest = {
+        'version': SNAPSHOT_VERSION,
+        'sources': fingerprints or [file_fingerprint(p) for p in source_paths],
+        'tables': list(tables),
+        'metadata': metadata or {}
+    }
+    tmp_manifest = os.path.join(snapshot_dir, MANIFEST_FILE + ".tmp")
+    with open(tmp_manifest, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_manifest, manifest_path)
+    return True
+
+
+def snapshot_version(snapshot_dir=SNAPSHOT_DIR):
+    # Short key that changes whenever any source file's content does
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        return None
+    digest = hashlib.sha256(str(SNAPSHOT_VERSION).encode())
+    for source in manifest['sources']:
+        digest.update(source['sha256'].encode())
+    return digest.hexdigest()[:16]
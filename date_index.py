@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+
+class DateIndex:
+    # Sorted distinct dates with the [start, end) offsets of each date's rows in date
+    # order, so a date range is two binary searches and a slice instead of a boolean
+    # mask over the full column. Frames already in date order (the index data, a
+    # single symbol's rows) need no permutation at all
+
+    def __init__(self, df, date_col='Date'):
+        self.frame = df
+        dates = df[date_col].to_numpy()
+        if pd.Index(dates).is_monotonic_increasing:
+            self.order = None
+            ordered = dates
+        else:
+            self.order = np.argsort(dates, kind='stable')
+            ordered = dates[self.order]
+
+        boundaries = np.flatnonzero(ordered[1:] != ordered[:-1]) + 1
+        starts = np.r_[0, boundaries] if len(ordered) else np.array([], dtype=int)
+        self.dates = pd.DatetimeIndex(ordered[starts])
+        self.bounds = np.r_[starts, len(ordered)]
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def first(self):
+        return self.dates[0] if len(self.dates) else None
+
+    @property
+    def last(self):
+        return self.dates[-1] if len(self.dates) else None
+
+    def row_codes(self):
+        # Position of each row's date in self.dates, in the frame's row order
+        codes = np.repeat(np.arange(len(self.dates)), np.diff(self.bounds))
+        if self.order is None:
+            return codes
+        row_codes = np.empty_like(codes)
+        row_codes[self.order] = codes
+        return row_codes
+
+    def date_codes(self, start=None, end=None):
+        # [lo, hi) positions in self.dates of the trading days within start..end
+        lo = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), side='left')
+        hi = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), side='right')
+        return lo, max(lo, hi)
+
+    def positions(self, start=None, end=None):
+        # Row positions of the range, in the frame's own row order
+        lo, hi = self.date_codes(start, end)
+        a, b = self.bounds[lo], self.bounds[hi]
+        if self.order is None:
+            return np.arange(a, b)
+        return np.sort(self.order[a:b])
+
+    def rows(self, start=None, end=None):
+        if self.order is None:
+            lo, hi = self.date_codes(start, end)
+            return self.frame.iloc[self.bounds[lo]:self.bounds[hi]]
+        return self.frame.iloc[self.positions(start, end)]
+
+    def rows_on(self, date):
+        return self.rows(date, date)
+
+    def is_full(self, start=None, end=None):
+        return self.date_codes(start, end) == (0, len(self.dates))
+
+
+def date_slice(df, date_range=None, date_col='Date'):
+    if date_range is None:
+        return df
+    return DateIndex(df, date_col).rows(*date_range)
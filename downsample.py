@@ -0,0 +1,82 @@
+import numpy as np
+
+from date_index import date_slice
+
+# Roughly one point per horizontal pixel of a full-width chart
+DEFAULT_POINTS = 1000
+# Candles need a few pixels each to stay readable
+DEFAULT_BARS = 300
+METHODS = ('lttb', 'minmax')
+
+
+def lttb_indices(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: first and last points are kept, and from each
+    # equal-count bucket in between the point forming the largest triangle with the
+    # previously kept point and the next bucket's average
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    cx = np.concatenate([[0.0], np.cumsum(x)])
+    cy = np.concatenate([[0.0], np.cumsum(y)])
+    avg_x = np.append((cx[edges[1:]] - cx[edges[:-1]]) / counts, x[-1])
+    avg_y = np.append((cy[edges[1:]] - cy[edges[:-1]]) / counts, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y, n_out):
+    # Lowest and highest point of each bucket, so spikes survive at any zoom level
+    n = len(y)
+    n_buckets = (n_out - 2) // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    width = int(np.diff(edges).max())
+    positions = edges[:-1, None] + np.arange(width)[None, :]
+    valid = positions < edges[1:, None]
+    values = y[np.minimum(positions, n - 1)]
+    lows = positions[np.arange(n_buckets), np.where(valid, values, np.inf).argmin(axis=1)]
+    highs = positions[np.arange(n_buckets), np.where(valid, values, -np.inf).argmax(axis=1)]
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def visible_rows(df, date_range=None, date_col='Date'):
+    # Zooming in narrows the rows before downsampling, so detail comes back at full resolution
+    return date_slice(df, date_range, date_col)
+
+
+def downsample_frame(df, y, n_out=DEFAULT_POINTS, method='lttb', x='Date', group='Symbol'):
+    # At most n_out rows per group; each group's rows must already be in x order
+    if n_out is None or len(df) <= n_out:
+        return df
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+
+    keep = []
+    for positions in df.groupby(group, observed=True, sort=False).indices.values():
+        if len(positions) <= n_out:
+            keep.append(positions)
+            continue
+        values = df[y].to_numpy()[positions]
+        if method == 'lttb':
+            xs = df[x].to_numpy()[positions].astype(np.int64)
+            keep.append(positions[lttb_indices(xs, values, n_out)])
+        else:
+            keep.append(positions[minmax_indices(values, n_out)])
+    return df.iloc[np.sort(np.concatenate(keep))]
+
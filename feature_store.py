@@ -0,0 +1,82 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_snapshot import SNAPSHOT_DIR
+from symbol_index import SymbolIndex
+
+# Mean and std of each of these per symbol, named like 'ClosePriceMean' / 'ClosePriceStd'
+AGGREGATED_COLUMNS = ['ClosePrice', 'Volatility', 'DiffPercent', 'RangePercent', 'VWAPPercent', 'Transactions']
+
+# Values from each symbol's most recent trading day, named like 'LastClosePrice'
+LATEST_COLUMNS = ['Date', 'OpenPrice', 'HighPrice', 'LowPrice', 'ClosePrice', 'DiffPercent', 'Volatility', '120Days', 'Turnover']
+
+# Feature tables kept on disk, newest first (e.g. full and compact mode side by side)
+KEEP_VERSIONS = 4
+
+
+def compute_features(df=None, symbol_index=None):
+    if symbol_index is None:
+        symbol_index = SymbolIndex(df)
+    frame = symbol_index.frame
+    if 'Volatility' not in frame.columns:
+        frame = frame.assign(Volatility=frame['HighPrice'] - frame['LowPrice'])
+
+    grouped = frame.groupby('Symbol', observed=True, sort=True)
+    columns = [c for c in AGGREGATED_COLUMNS if c in frame.columns]
+    stats = grouped[columns].agg(['mean', 'std'])
+    stats.columns = [f"{col}{stat.capitalize()}" for col, stat in stats.columns]
+    stats.index = stats.index.astype(str)
+
+    # Close-to-close returns within each symbol's block
+    closes = frame['ClosePrice'].to_numpy(dtype=np.float64)
+    same_symbol = np.ones(len(closes), dtype=bool)
+    same_symbol[symbol_index.starts] = False
+    returns = np.full(len(closes), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns[1:] = closes[1:] / closes[:-1] - 1
+    returns[~same_symbol] = np.nan
+    return_stats = pd.Series(returns).groupby(frame['Symbol'].astype(str).to_numpy()).agg(['mean', 'std'])
+
+    features = pd.DataFrame(index=pd.Index(symbol_index.symbols, name='Symbol').astype(str))
+    features = features.join(stats)
+    features['ReturnMean'] = return_stats['mean'].reindex(features.index).to_numpy()
+    features['ReturnStd'] = return_stats['std'].reindex(features.index).to_numpy()
+    features['TradingDays'] = symbol_index.ends - symbol_index.starts
+
+    latest = frame.iloc[symbol_index.ends - 1]
+    for col in LATEST_COLUMNS:
+        if col in latest.columns:
+            features[f"Last{col}"] = latest[col].to_numpy()
+
+    return features.reset_index()
+
+
+def _feature_path(data_version, snapshot_dir):
+    return os.path.join(snapshot_dir, f"features-{data_version}.parquet")
+
+
+def load_feature_table(df=None, data_version=None, snapshot_dir=SNAPSHOT_DIR, symbol_index=None):
+    # One table per data version next to the dataset snapshot; only the newest few
+    # versions are kept
+    path = _feature_path(data_version, snapshot_dir) if data_version else None
+    if path and os.path.exists(path):
+        try:
+            return pd.read_parquet(path)
+        except (OSError, ValueError):
+            pass
+
+    features = compute_features(df, symbol_index=symbol_index)
+
+    if path and os.path.isdir(snapshot_dir):
+        try:
+            features.to_parquet(path)
+        except (OSError, ValueError, TypeError, ImportError) as e:
+            print(f"Could not write feature table: {e}")
+
+        versions = sorted(glob.glob(os.path.join(snapshot_dir, "features-*.parquet")), key=os.path.getmtime, reverse=True)
+        for stale in versions[KEEP_VERSIONS:]:
+            os.remove(stale)
+    return features
@@ -0,0 +1,43 @@
+import io
+
+import matplotlib.pyplot as plt
+import plotly.graph_objects as go
+
+# Same defaults st.pyplot uses, so cached images look unchanged
+RENDER_DPI = 200
+BACKENDS = ('matplotlib', 'plotly')
+
+
+def figure_png(fig, dpi=RENDER_DPI):
+    # Rasterize once and release the figure; the bytes are what gets cached
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+def render_figure(fig, dpi=RENDER_DPI):
+    # Matplotlib figures become PNG bytes; Plotly figures are already serializable
+    if fig is None or isinstance(fig, go.Figure):
+        return fig
+    return figure_png(fig, dpi=dpi)
+
+
+def line_figure(df, x, y, hue, title, xaxis_title, yaxis_title, height=600):
+    # One WebGL trace per series so long histories stay responsive in the browser
+    fig = go.Figure()
+    for name, group in df.groupby(hue, observed=True, sort=False):
+        fig.add_trace(go.Scattergl(x=group[x], y=group[y], mode='lines', name=str(name)))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title=xaxis_title,
+        yaxis_title=yaxis_title,
+        legend_title=hue,
+        template='plotly_dark',
+        height=height,
+        hovermode='x unified'
+    )
+    return fig
@@ -1,33 +1,56 @@
 import plotly.express as px
 from symbol_to_group import symbol_to_group
 
-def plot_stock_heatmap(df, date_filter=None):
-    if date_filter is None:
-        date_filter = df['Date'].max()
-    
-    df = df[df['Date'] == date_filter]
+def sector_treemap(tiles, title):
+    # Tiles sized by turnover; equal tiles when no turnover was recorded
+    tiles = tiles.dropna(subset=['Group', 'DiffPercent'])
+    if 'Turnover' in tiles.columns and (tiles['Turnover'] > 0).any():
+        sizes = tiles['Turnover'].fillna(0).clip(lower=0)
+    else:
+        sizes = [1] * len(tiles)
 
-    df = df.sort_values('Date').drop_duplicates('Symbol', keep='last')
-
-    # Map sectors
-    df['Group'] = df['Symbol'].map(symbol_to_group)
-
-    df = df.dropna(subset=['Group', 'DiffPercent'])
-
-    df['CappedChange'] = df['DiffPercent'].clip(-5, 5)
+    tiles = tiles.assign(CappedChange=tiles['DiffPercent'].clip(-5, 5))
 
     fig = px.treemap(
-        df,
+        tiles,
         path=['Group', 'Symbol'],
-        values=[1] * len(df),  
+        values=sizes,
         color='CappedChange',
         color_continuous_scale=['red', 'white', 'green'],
         range_color=[-5, 5],
-        title=f'📊 NEPSE Heatmap - {date_filter}'
+        title=title
     )
 
     fig.update_traces(
-        hovertemplate='<b>%{label}</b><br>Change: %{color:.2f}%<extra></extra>'
+        hovertemplate='<b>%{label}</b><br>Change: %{color:.2f}%<br>Turnover: %{value:,.0f}<extra></extra>'
     )
 
     return fig
+
+
+def plot_sector_heatmap(engine, start, end=None):
+    # Any day or date range straight from the sector engine's date index
+    tiles = engine.tiles(start, end)
+    period = f"{start:%Y-%m-%d}" if end is None or end == start else f"{start:%Y-%m-%d} → {end:%Y-%m-%d}"
+    return sector_treemap(tiles, f'📊 NEPSE Heatmap - {period}')
+
+
+def plot_stock_heatmap(df, date_filter=None, features=None):
+    if features is not None and date_filter is None:
+        # Latest day: every symbol's last row is already in the feature table
+        date_filter = features['LastDate'].max()
+        latest = features['LastDate'] == date_filter
+        columns = {'LastDiffPercent': 'DiffPercent', 'LastTurnover': 'Turnover'}
+        df = features.loc[latest, ['Symbol'] + [c for c in columns if c in features.columns]].rename(columns=columns)
+    else:
+        if date_filter is None:
+            date_filter = df['Date'].max()
+
+        df = df[df['Date'] == date_filter]
+
+        df = df.sort_values('Date').drop_duplicates('Symbol', keep='last')
+
+    # Map sectors
+    df = df.assign(Group=df['Symbol'].astype(str).map(symbol_to_group))
+
+    return sector_treemap(df, f'📊 NEPSE Heatmap - {date_filter}')
@@ -0,0 +1,250 @@
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from cleaning_pipeline import (
+    CLEANING_STAGES, FFILL_COLUMNS, GROUP_MEDIAN_COLUMNS,
+    clean_index_data, format_report, missing_value_table, run_pipeline
+)
+from data_snapshot import (
+    SNAPSHOT_DIR, file_fingerprint, file_hash, load_snapshot, load_table, open_prefix,
+    read_manifest, save_snapshot
+)
+from rolling_correlation import clear_rolling_states, sync_rolling_states
+
+STOCK_DATA_CSV = "nepse_combined_cleaned.csv"
+INDEX_DATA_CSV = "combined_nepse_index_data.csv"
+
+# parse/filter/coerce only look at the row itself, so they can run on new days alone;
+# impute/ffill depend on each symbol's history and are updated per touched symbol
+ROW_STAGES = [stage for stage in CLEANING_STAGES if stage[0] in ('parse', 'filter', 'coerce')]
+HISTORY_STAGES = [stage for stage in CLEANING_STAGES if stage[0] in ('impute', 'ffill')]
+
+# Pre-imputation values kept next to the cleaned frame so medians can be refreshed
+RAW_COLUMNS = GROUP_MEDIAN_COLUMNS + ['PrevClosePrice']
+GLOBAL_FLAG_COLUMNS = [f"{col}_global" for col in GROUP_MEDIAN_COLUMNS]
+
+
+def _count_rows(path, size, chunk_size=1 << 20):
+    newlines = 0
+    last = b'\n'
+    with open_prefix(path, size) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            newlines += chunk.count(b'\n')
+            last = chunk[-1:]
+    # Header line does not count, an unterminated last line does
+    return newlines - 1 + (last != b'\n')
+
+
+def _raw_values(df):
+    raw_values = df[RAW_COLUMNS].copy()
+    has_value = df[GROUP_MEDIAN_COLUMNS].notna().groupby(df['Symbol'], observed=True).transform('any')
+    # Symbols with no value at all get the market-wide median instead of their own
+    for col, flag_col in zip(GROUP_MEDIAN_COLUMNS, GLOBAL_FLAG_COLUMNS):
+        raw_values[flag_col] = ~has_value[col]
+    return raw_values
+
+
+def _block_positions(starts, ends):
+    # Concatenate the ranges [start, end) without a Python loop
+    lengths = ends - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return np.arange(lengths.sum()) + offsets
+
+
+def _read_sources(stock_path, index_path):
+    # Fingerprints first, then only the fingerprinted bytes are read
+    fingerprints = [file_fingerprint(stock_path), file_fingerprint(index_path)]
+    return fingerprints, open_prefix(stock_path, fingerprints[0]['size'])
+
+
+def _clean_index(index_path, fingerprint):
+    with open_prefix(index_path, fingerprint['size']) as f:
+        return clean_index_data(f)
+
+
+def build_store(stock_path=STOCK_DATA_CSV, index_path=INDEX_DATA_CSV, snapshot_dir=SNAPSHOT_DIR, report=None):
+    # Stage timings go to the stage.* spans, and into `report` when the caller passes a list
+    fingerprints, stock_source = _read_sources(stock_path, index_path)
+    with stock_source:
+        nepse_combined_df, row_report = run_pipeline(stock_source, ROW_STAGES)
+    raw_values = _raw_values(nepse_combined_df)
+
+    nepse_combined_df, history_report = run_pipeline(nepse_combined_df, HISTORY_STAGES)
+    raw_values = raw_values.loc[nepse_combined_df.index]
+
+    nepse_index_df = _clean_index(index_path, fingerprints[1])
+    missing_table = missing_value_table(nepse_combined_df)
+
+    frames = (nepse_combined_df, nepse_index_df, missing_table)
+    save_snapshot(
+        [stock_path, index_path], frames, snapshot_dir,
+        extra_tables={'raw_values': raw_values},
+        metadata={'raw_rows': _count_rows(stock_path, fingerprints[0]['size'])},
+        fingerprints=fingerprints
+    )
+    # Past days may have changed, so running window sums can't be carried over
+    clear_rolling_states(snapshot_dir)
+    if report is not None:
+        report.extend(row_report + history_report)
+    return frames
+
+
+def _appended_tail(stock_path, manifest):
+    fingerprint = manifest['sources'][0]
+    if fingerprint['path'] != os.path.abspath(stock_path) or not os.path.exists(stock_path):
+        return None
+
+    old_size = fingerprint['size']
+    if os.path.getsize(stock_path) <= old_size:
+        return None
+    # Only a pure append of whole lines can be ingested on its own
+    if file_hash(stock_path, limit=old_size) != fingerprint['sha256']:
+        return None
+
+    new_fingerprint = file_fingerprint(stock_path)
+    with open_prefix(stock_path, new_fingerprint['size']) as f:
+        header = f.readline()
+        f.seek(old_size - 1)
+        boundary = f.read(1)
+        tail = f.read()
+
+    if boundary != b'\n':
+        return None
+    return header + tail, tail.count(b'\n') + (not tail.endswith(b'\n')), new_fingerprint
+
+
+def ingest_rows(nepse_combined_df, raw_values, source, first_label=0):
+    new_df, report = run_pipeline(source, ROW_STAGES)
+    new_df.index = new_df.index + first_label
+
+    if new_df.empty:
+        return nepse_combined_df, raw_values, report
+    # Rows for days already in the store are corrections, not appends
+    if (new_df['Date'] <= nepse_combined_df['Date'].max()).any():
+        return None
+
+    new_df = new_df.sort_values(by=['Symbol', 'Date'])
+    new_df['Transactions'] = new_df['Transactions'].fillna(0)
+    new_raw = new_df[RAW_COLUMNS].copy()
+    new_raw[GLOBAL_FLAG_COLUMNS] = False
+
+    # Splice each symbol's new days in after its existing block, keeping (Symbol, Date) order
+    n_old = len(nepse_combined_df)
+    insert_at = np.searchsorted(nepse_combined_df['Symbol'].to_numpy(), new_df['Symbol'].to_numpy(), side='right')
+    order = np.insert(np.arange(n_old), insert_at, np.arange(n_old, n_old + len(new_df)))
+    df = pd.concat([nepse_combined_df, new_df]).take(order)
+    raw = pd.concat([raw_values, new_raw]).take(order)
+
+    symbols = df['Symbol'].to_numpy()
+    touched = new_df['Symbol'].unique()
+    starts = np.searchsorted(symbols, touched, side='left')
+    ends = np.searchsorted(symbols, touched, side='right')
+    positions = _block_positions(starts, ends)
+    block_symbols = symbols[positions]
+
+    # Refresh per-symbol medians only for touched symbols that actually have gaps
+    for col, flag_col in zip(GROUP_MEDIAN_COLUMNS, GLOBAL_FLAG_COLUMNS):
+        block_raw = raw[col].to_numpy()[positions]
+        gap_symbols = np.unique(block_symbols[np.isnan(block_raw)])
+        if len(gap_symbols) == 0:
+            continue
+        rows = positions[np.isin(block_symbols, gap_symbols)]
+        values = raw[col].iloc[rows]
+        medians = values.groupby(symbols[rows], observed=True).transform('median')
+        df.iloc[rows, df.columns.get_loc(col)] = values.fillna(medians).to_numpy()
+        raw.iloc[rows, raw.columns.get_loc(flag_col)] = medians.isna().to_numpy()
+
+    # The market-wide fallback median moves with every day, so refill its rows
+    for col, flag_col in zip(GROUP_MEDIAN_COLUMNS, GLOBAL_FLAG_COLUMNS):
+        flagged = raw[flag_col].to_numpy(dtype=bool)
+        if flagged.any():
+            df.iloc[flagged, df.columns.get_loc(col)] = np.nanmedian(df[col].to_numpy()[~flagged])
+
+    prev_close_missing = raw['PrevClosePrice'].isna().to_numpy()
+    if prev_close_missing.any():
+        df.iloc[prev_close_missing, df.columns.get_loc('PrevClosePrice')] = raw['PrevClosePrice'].median()
+
+    # Forward-fill new rows from the last stored day of their symbol
+    seed_starts = np.maximum(starts, ends - new_df.groupby('Symbol', observed=True).size().reindex(touched).to_numpy() - 1)
+    tail_positions = _block_positions(seed_starts, ends)
+    tail = df.iloc[tail_positions]
+    filled = tail.groupby('Symbol', observed=True)[FFILL_COLUMNS].ffill()
+    for col in FFILL_COLUMNS:
+        df.iloc[tail_positions, df.columns.get_loc(col)] = filled[col].to_numpy()
+
+    return df, raw, report
+
+
+def refresh_store(stock_path=STOCK_DATA_CSV, index_path=INDEX_DATA_CSV, snapshot_dir=SNAPSHOT_DIR, report=None):
+    snapshot = load_snapshot([stock_path, index_path], snapshot_dir)
+    if snapshot is not None:
+        return snapshot
+
+    manifest = read_manifest(snapshot_dir)
+    appended = _appended_tail(stock_path, manifest) if manifest else None
+    raw_values = load_table('raw_values', snapshot_dir) if appended else None
+    stored = load_table('stock', snapshot_dir) if raw_values is not None else None
+    if stored is None:
+        return build_store(stock_path, index_path, snapshot_dir, report)
+
+    tail, tail_rows, stock_fingerprint = appended
+    raw_rows = manifest['metadata']['raw_rows']
+    result = ingest_rows(stored, raw_values, io.BytesIO(tail), first_label=raw_rows)
+    if result is None:
+        return build_store(stock_path, index_path, snapshot_dir, report)
+    nepse_combined_df, raw_values, tail_report = result
+
+    # The index file is small, so it is simply re-cleaned when it changes
+    index_fingerprint = file_fingerprint(index_path)
+    nepse_index_df = None
+    if index_fingerprint['sha256'] == manifest['sources'][1]['sha256']:
+        nepse_index_df = load_table('index', snapshot_dir)
+    if nepse_index_df is None:
+        nepse_index_df = _clean_index(index_path, index_fingerprint)
+
+    frames = (nepse_combined_df, nepse_index_df, missing_value_table(nepse_combined_df))
+    save_snapshot(
+        [stock_path, index_path], frames, snapshot_dir,
+        extra_tables={'raw_values': raw_values},
+        metadata={'raw_rows': raw_rows + tail_rows},
+        fingerprints=[stock_fingerprint, index_fingerprint]
+    )
+    if report is not None:
+        report.extend(tail_report)
+    return frames
+
+
+def append_day_files(day_paths, stock_path=STOCK_DATA_CSV):
+    with open(stock_path, 'rb') as f:
+        header = f.readline()
+        f.seek(0, os.SEEK_END)
+        f.seek(max(f.tell() - 1, 0))
+        needs_newline = f.read(1) != b'\n'
+
+    with open(stock_path, 'ab') as out:
+        if needs_newline:
+            out.write(b'\n')
+        for path in day_paths:
+            with open(path, 'rb') as f:
+                if f.readline().strip() != header.strip():
+                    raise ValueError(f"{path} does not have the same columns as {stock_path}")
+                body = f.read()
+            if body and not body.endswith(b'\n'):
+                body += b'\n'
+            out.write(body)
+
+
+if __name__ == '__main__':
+    # Usage: python incremental_ingest.py [daily_export.csv ...]
+    if sys.argv[1:]:
+        append_day_files(sys.argv[1:])
+    report = []
+    stock_df, index_df, _ = refresh_store(report=report)
+    if report:
+        print(format_report(report))
+    sync_rolling_states(stock_df, index_df)
+    print(f"{len(stock_df)} rows up to {stock_df['Date'].max():%Y-%m-%d}")
@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+from symbol_index import SymbolIndex
+
+SMA_WINDOWS = (20, 50, 120)
+EMA_SPANS = (12, 26)
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+BOLLINGER_WINDOW = 20
+BOLLINGER_WIDTH = 2
+# Moving average the trend signals compare the close against
+TREND_MA = 'SMA120'
+
+
+def padded_matrix(symbol_index, values):
+    # symbol x day-offset matrix of each symbol's rows, NaN after its last day, and the
+    # (symbol, offset) of every row to map results back
+    lengths = symbol_index.ends - symbol_index.starts
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    offsets = np.arange(len(values)) - np.repeat(symbol_index.starts, lengths)
+    matrix = np.full((len(lengths), lengths.max() if len(lengths) else 0), np.nan)
+    matrix[rows, offsets] = values
+    return matrix, (rows, offsets)
+
+
+def rolling_mean_std(matrix, window):
+    # Trailing mean and population std along each row from cumulative sums; a window
+    # needs all `window` values, like pandas' rolling(window)
+    # Centering each row on its first value keeps the squared sums small
+    offset = np.nan_to_num(matrix[:, :1])
+    x = matrix - offset
+    valid = ~np.isnan(x)
+    x = np.where(valid, x, 0)
+    zeros = np.zeros((len(x), 1))
+    mean = np.full(matrix.shape, np.nan)
+    std = np.full(matrix.shape, np.nan)
+    if matrix.shape[1] < window:
+        return mean, std
+
+    def window_sum(values):
+        cumulative = np.concatenate([zeros, np.cumsum(values, axis=1)], axis=1)
+        return cumulative[:, window:] - cumulative[:, :-window]
+
+    count, total, squares = window_sum(valid.astype(np.float64)), window_sum(x), window_sum(x * x)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        window_mean = total / count
+        variance = np.maximum(squares / count - window_mean ** 2, 0)
+    full = count == window
+    mean[:, window - 1:] = np.where(full, window_mean + offset, np.nan)
+    std[:, window - 1:] = np.where(full, np.sqrt(variance), np.nan)
+    return mean, std
+
+
+def exponential_mean(matrix, alpha, min_periods=0):
+    # Recursive EMA (pandas ewm(adjust=False)) along each row, one vectorized step per
+    # day offset across all symbols; leading NaNs are skipped
+    out = np.full(matrix.shape, np.nan)
+    previous = np.full(len(matrix), np.nan)
+    for j in range(matrix.shape[1]):
+        x = matrix[:, j]
+        previous = np.where(np.isnan(x), previous, np.where(np.isnan(previous), x, alpha * x + (1 - alpha) * previous))
+        out[:, j] = previous
+    if min_periods > 1:
+        seen = np.cumsum(~np.isnan(matrix), axis=1)
+        out[seen < min_periods] = np.nan
+    return out
+
+
+def _shift(matrix):
+    shifted = np.full(matrix.shape, np.nan)
+    shifted[:, 1:] = matrix[:, :-1]
+    return shifted
+
+
+def relative_strength_index(close, window=RSI_WINDOW):
+    # Wilder's RSI: smoothed gains over smoothed losses of the close-to-close change
+    delta = close - _shift(close)
+    gain = exponential_mean(np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0)), 1 / window, window)
+    loss = exponential_mean(np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0)), 1 / window, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + gain / loss)
+    return np.where((loss == 0) & ~np.isnan(gain), 100.0, rsi)
+
+
+def average_true_range(high, low, close, window=ATR_WINDOW):
+    # Wilder-smoothed true range; the first day has no previous close and uses high - low
+    previous = _shift(close)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+    return exponential_mean(true_range, 1 / window, window)
+
+
+def compute_indicators(df=None, symbol_index=None):
+    # Every indicator for every row, in the symbol index's (Symbol, Date) row order
+    if symbol_index is None:
+        symbol_index = SymbolIndex(df)
+    frame = symbol_index.frame
+
+    def column(name):
+        return padded_matrix(symbol_index, frame[name].to_numpy(dtype=np.float64))[0]
+
+    close, (rows, offsets) = padded_matrix(symbol_index, frame['ClosePrice'].to_numpy(dtype=np.float64))
+    results = {}
+    for window in SMA_WINDOWS:
+        results[f'SMA{window}'] = rolling_mean_std(close, window)[0]
+    for span in EMA_SPANS:
+        results[f'EMA{span}'] = exponential_mean(close, 2 / (span + 1))
+    results[f'RSI{RSI_WINDOW}'] = relative_strength_index(close)
+    results[f'ATR{ATR_WINDOW}'] = average_true_range(column('HighPrice'), column('LowPrice'), close)
+
+    middle, std = rolling_mean_std(close, BOLLINGER_WINDOW)
+    results['BollingerMiddle'] = middle
+    results['BollingerUpper'] = middle + BOLLINGER_WIDTH * std
+    results['BollingerLower'] = middle - BOLLINGER_WIDTH * std
+    with np.errstate(divide='ignore', invalid='ignore'):
+        results['BollingerPercentB'] = (close - results['BollingerLower']) / (results['BollingerUpper'] - results['BollingerLower'])
+        results['VWAPDeviation'] = (close / column('VWAP') - 1) * 100
+
+    indicators = pd.DataFrame({
+        'Symbol': frame['Symbol'].to_numpy(),
+        'Date': frame['Date'].to_numpy(),
+        'ClosePrice': frame['ClosePrice'].to_numpy(dtype=np.float64),
+    }, index=frame.index)
+    for name, matrix in results.items():
+        indicators[name] = matrix[rows, offsets]
+    return indicators
+
+
+def latest_indicators(indicators, symbol_index):
+    # Each symbol's most recent row
+    return indicators.iloc[symbol_index.ends - 1].reset_index(drop=True)
@@ -1,13 +1,24 @@
 import plotly.graph_objects as go
+from symbol_index import symbol_rows
+from downsample import DEFAULT_BARS, visible_rows
+from ohlc_resample import resample_ohlc, visible_frequency, frequency_label
 
-def plot_candlestick(nepse_combined_df, symbol):
+def plot_candlestick(nepse_combined_df, symbol, symbol_index=None, max_bars=DEFAULT_BARS, date_range=None, freq='auto', bars=None):
     
-    stock_data = nepse_combined_df[nepse_combined_df['Symbol'] == symbol].sort_values('Date')
+    stock_data = symbol_rows(nepse_combined_df, symbol, symbol_index)
 
-    if stock_data.empty:
+    if visible_rows(stock_data, date_range).empty:
         print(f"No data found for {symbol}")
         return None
 
+    # Bar size follows the visible range so the chart stays at a few hundred candles;
+    # precomputed full-history bars for that size can be passed in
+    if freq == 'auto':
+        freq = visible_frequency(stock_data, date_range, max_bars)
+    if bars is None:
+        bars = resample_ohlc(stock_data, freq=freq)
+    stock_data = visible_rows(bars, date_range)
+
     fig = go.Figure(data=[go.Candlestick(
         x=stock_data['Date'],
         open=stock_data['OpenPrice'],
@@ -19,7 +30,7 @@ def plot_candlestick(nepse_combined_df, symbol):
     )])
 
     fig.update_layout(
-        title=f'Candlestick Chart for {symbol}',
+        title=f'Candlestick Chart for {symbol} ({frequency_label(freq)} Bars)',
         xaxis_title='Date',
         yaxis_title='Price',
         xaxis_rangeslider_visible=False,
@@ -0,0 +1,211 @@
+import contextlib
+import contextvars
+import functools
+import json
+import time
+import tracemalloc
+import uuid
+
+import pandas as pd
+
+# The profiler of the current script run; each Streamlit session reruns in its own
+# thread, so sessions never record into each other's profiler
+_active = contextvars.ContextVar('nepse_profiler', default=None)
+
+RECORD_FIELDS = ['run', 'name', 'parent', 'depth', 'started', 'wall_ms', 'cpu_ms', 'rows', 'cache', 'peak_bytes']
+
+
+def result_rows(result):
+    # Row count of a frame result, or of the first frame in a tuple result
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return len(result)
+    if isinstance(result, tuple):
+        for item in result:
+            if isinstance(item, (pd.DataFrame, pd.Series)):
+                return len(item)
+    return None
+
+
+class Profiler:
+    # Nested spans of one script run: wall and thread CPU time, rows, cache outcome
+    # and, when tracing memory, the peak allocation above the span's starting point
+
+    def __init__(self, trace_memory=False):
+        self.run_id = uuid.uuid4().hex[:8]
+        self.trace_memory = trace_memory
+        self.records = []
+        self._stack = []
+        self._owns_tracing = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        _active.set(self)
+        return self
+
+    def stop(self):
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+        if _active.get() is self:
+            _active.set(None)
+
+    def open(self, name, cached=False):
+        parent = self._stack[-1] if self._stack else None
+        record = {
+            'run': self.run_id,
+            'name': name,
+            'parent': parent['name'] if parent else None,
+            'depth': len(self._stack),
+            'started': time.time(),
+            'wall_ms': None,
+            'cpu_ms': None,
+            'rows': None,
+            'cache': 'hit' if cached else None,
+            'peak_bytes': None,
+        }
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            # Keep the parent's peak before resetting the counter for this span
+            if parent is not None and '_peak' in parent:
+                parent['_peak'] = max(parent['_peak'], peak)
+            tracemalloc.reset_peak()
+            record['_base'], record['_peak'] = current, current
+        record['_wall'], record['_cpu'] = time.perf_counter(), time.thread_time()
+        self.records.append(record)
+        self._stack.append(record)
+        return record
+
+    def close(self, record):
+        record['wall_ms'] = (time.perf_counter() - record.pop('_wall')) * 1000
+        record['cpu_ms'] = (time.thread_time() - record.pop('_cpu')) * 1000
+        if '_base' in record:
+            peak = record.pop('_peak')
+            if tracemalloc.is_tracing():
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+            record['peak_bytes'] = peak - record.pop('_base')
+            parent = self._stack[-2] if len(self._stack) > 1 else None
+            if parent is not None and '_peak' in parent:
+                parent['_peak'] = max(parent['_peak'], peak)
+        self._stack.pop()
+
+    def mark_miss(self):
+        # The innermost open cached span actually computed its result
+        for record in reversed(self._stack):
+            if record['cache'] is not None:
+                record['cache'] = 'miss'
+                return
+
+    def finished_records(self):
+        return [record for record in self.records if record['wall_ms'] is not None]
+
+    def to_jsonl(self):
+        return records_to_jsonl(self.finished_records())
+
+
+def records_to_jsonl(records):
+    return ''.join(json.dumps({k: record[k] for k in RECORD_FIELDS}) + '\n' for record in records)
+
+
+def records_table(records):
+    table = pd.DataFrame(records, columns=RECORD_FIELDS)
+    # Indent nested spans under their parent
+    table['name'] = ['· ' * depth + name for depth, name in zip(table['depth'], table['name'])]
+    return table
+
+
+def summarize(records):
+    # Per-span totals across runs, slowest first
+    table = pd.DataFrame(records, columns=RECORD_FIELDS)
+    if table.empty:
+        return table
+    summary = table.groupby('name').agg(
+        Calls=('wall_ms', 'size'),
+        MeanWallMs=('wall_ms', 'mean'),
+        MaxWallMs=('wall_ms', 'max'),
+        MeanCpuMs=('cpu_ms', 'mean'),
+        Hits=('cache', lambda c: int((c == 'hit').sum())),
+        Misses=('cache', lambda c: int((c == 'miss').sum())),
+        MaxPeakBytes=('peak_bytes', 'max'),
+    )
+    return summary.sort_values('MeanWallMs', ascending=False)
+
+
+def start_profiling(enabled, trace_memory=False):
+    # Called at the top of every run so a profiler from an earlier run never lingers
+    previous = _active.get()
+    if previous is not None:
+        previous.stop()
+    if not enabled:
+        return None
+    return Profiler(trace_memory).start()
+
+
+def active_profiler():
+    return _active.get()
+
+
+@contextlib.contextmanager
+def span(name, cached=False):
+    profiler = _active.get()
+    if profiler is None:
+        yield None
+        return
+    record = profiler.open(name, cached)
+    try:
+        yield record
+    finally:
+        profiler.close(record)
+
+
+def instrumented(name=None):
+    # Records each call as a span named after the function
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _active.get() is None:
+                return fn(*args, **kwargs)
+            with span(label) as record:
+                result = fn(*args, **kwargs)
+                record['rows'] = result_rows(result)
+            return result
+        return wrapper
+    return decorator
+
+
+def profiled_cache(cache_decorator, name=None):
+    # Wraps a Streamlit cache decorator: each call is a span, marked as a miss when the
+    # cached body actually runs
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def compute(*args, **kwargs):
+            profiler = _active.get()
+            if profiler is not None:
+                profiler.mark_miss()
+            return fn(*args, **kwargs)
+
+        cached_fn = cache_decorator(compute)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _active.get() is None:
+                return cached_fn(*args, **kwargs)
+            with span(label, cached=True) as record:
+                result = cached_fn(*args, **kwargs)
+                record['rows'] = result_rows(result)
+            return result
+
+        wrapper.clear = cached_fn.clear
+        return wrapper
+    return decorator
+
+
+def append_jsonl(profiler, path):
+    with open(path, 'a') as f:
+        f.write(profiler.to_jsonl())
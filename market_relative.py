@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from correlation_engine import MIN_OVERLAP
+from rolling_correlation import WINDOWS, INDEX_COLUMN, market_return_matrix, rolling_beta
+
+# Roughly 48 five-day weeks net of holidays; used to annualize alpha
+TRADING_DAYS_PER_YEAR = 240
+
+
+class MarketRelative:
+    # Every symbol's daily returns against the index's Percentage Change on one shared
+    # date axis. Beta, alpha, correlation and relative strength for all symbols come
+    # from column sums over the masked return matrix instead of a regression per symbol
+
+    def __init__(self, df=None, nepse_index_df=None, min_overlap=MIN_OVERLAP, matrix=None):
+        # A precomputed (returns, dates, columns, spans) market return matrix can be
+        # passed instead of the frames
+        if matrix is None:
+            matrix = market_return_matrix(df, nepse_index_df)
+        values, self.dates, columns, spans = matrix
+        self.returns = values[:, :-1]
+        self.index_returns = values[:, -1]
+        # The index compounded over each stock return's own span, so the index's move on
+        # a day the symbol didn't trade still counts
+        self.span_returns = spans[:, :-1]
+        self.symbols = pd.Index(columns[:-1])
+        self.min_overlap = min_overlap
+
+    def _sums(self, rows=slice(None)):
+        # Per-symbol sums over the days where both the symbol and the index have a return
+        x = self.returns[rows]
+        y = self.span_returns[rows]
+        valid = ~np.isnan(x) & ~np.isnan(y)
+        x0, y0 = np.where(valid, x, 0), np.where(valid, y, 0)
+        return x0, y0, valid.sum(axis=0)
+
+    def _regression(self, rows=slice(None), min_overlap=None):
+        min_overlap = self.min_overlap if min_overlap is None else min_overlap
+        x0, y0, n = self._sums(rows)
+        sx, sy = x0.sum(axis=0), y0.sum(axis=0)
+        sxx, syy, sxy = (x0 * x0).sum(axis=0), (y0 * y0).sum(axis=0), (x0 * y0).sum(axis=0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = n * sxy - sx * sy
+            var_x, var_y = n * sxx - sx ** 2, n * syy - sy ** 2
+            beta = cov / var_y
+            alpha = (sx - beta * sy) / n
+            corr = np.clip(cov / np.sqrt(var_x * var_y), -1, 1)
+
+        too_short = n < min_overlap
+        for values in (beta, alpha, corr):
+            values[too_short | ~np.isfinite(values)] = np.nan
+        return n, beta, alpha, corr
+
+    def table(self, windows=WINDOWS):
+        # One row per symbol: full-period beta, annualized alpha, correlation, relative
+        # strength against the index over their shared days, and trailing-window betas
+        n, beta, alpha, corr = self._regression()
+        x0, y0, _ = self._sums()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative_strength = (np.prod(1 + x0, axis=0) / np.prod(1 + y0, axis=0) - 1) * 100
+
+        table = pd.DataFrame({
+            'Symbol': self.symbols,
+            'Beta': beta,
+            'Alpha %/yr': alpha * TRADING_DAYS_PER_YEAR * 100,
+            'Correlation': corr,
+            'R²': corr ** 2,
+            'Relative Strength %': np.where(n >= self.min_overlap, relative_strength, np.nan),
+            'Days': n,
+        })
+        for window in windows:
+            if window < len(self.dates):
+                table[f'Beta {window}d'] = self._regression(slice(-window, None), window // 2)[1]
+        return table
+
+    def _columns(self, symbols):
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        return self.symbols.get_indexer(symbols)
+
+    def rolling(self, symbols, window, min_periods=None):
+        # Rolling beta of the given symbols against the index, one column each
+        columns = self._columns(symbols)
+        columns = columns[columns >= 0]
+        beta = rolling_beta(self.returns[:, columns], self.span_returns[:, columns], window, min_periods)
+        return pd.DataFrame(beta, index=self.dates, columns=self.symbols[columns])
+
+    def relative_strength(self, symbol):
+        # Growth of 1 in the symbol and in the index, and their ratio, over the shared axis
+        column = self._columns(symbol)[0]
+        if column < 0:
+            return pd.DataFrame(columns=[symbol, INDEX_COLUMN, 'Relative Strength'])
+        stock = np.cumprod(1 + np.nan_to_num(self.returns[:, column]))
+        index = np.cumprod(1 + np.nan_to_num(self.index_returns))
+        return pd.DataFrame({symbol: stock, INDEX_COLUMN: index, 'Relative Strength': stock / index}, index=self.dates)
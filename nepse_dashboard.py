@@ -1,161 +1,362 @@
+import os
+import time
 import streamlit as st
 import pandas as pd
 from volatility_top_20 import calculate_volatility_plot
-from heatmap_by_sector import plot_stock_heatmap
+from heatmap_by_sector import plot_sector_heatmap
+from sector_engine import SectorEngine
 from daily_volatility_trend import plot_volatility_trend
 from stock_clusters import plot_stock_clusters
+from cluster_service import CLUSTER_FEATURES, ClusterSweep
 from closing_price_trend import plot_closing_price_trend
 from correlation_stock_price import correlation_stock_price
+from correlation_engine import CorrelationEngine
+from market_relative import MarketRelative
+from rolling_correlation import WINDOWS, INDEX_COLUMN, RollingCorrelation, market_return_matrix, rolling_stats, sync_rolling_states
 from individual_candle_stick import plot_candlestick
+from ohlc_resample import FREQUENCIES, resample_ohlc, visible_frequency
 from stock_future_trend import detect_trend, get_price_trend_slope
-from project_future_prices import plot_future_projection
+from project_future_prices import plot_future_projection, batch_projections
+from trend_screener import screen_trends
+from backtest import HORIZON, SIGNALS, backtest_signals
+from indicators import SMA_WINDOWS, RSI_WINDOW, TREND_MA, compute_indicators
+from incremental_ingest import refresh_store, STOCK_DATA_CSV, INDEX_DATA_CSV
+from symbol_index import SymbolIndex
+from date_index import DateIndex
+from compact_frame import compact_frame, memory_report
+from shared_dataset import add_derived_columns, read_only_frame, share_dataset
+from data_snapshot import snapshot_version
+from feature_store import compute_features, load_feature_table
+from precompute import read_artifact
+from figure_render import render_figure
+from instrumentation import profiled_cache, span, start_profiling, append_jsonl, records_table, records_to_jsonl, summarize
 
 st.set_page_config(page_title="NEPSE Dashboard", layout="wide")
 st.header("📈 NEPSE Dashboard")
-@st.cache_data
-def load_data():
-    # Load CSVs
-    nepse_combined_df = pd.read_csv("nepse_combined_cleaned.csv", low_memory=False)
-    nepse_index_df = pd.read_csv("combined_nepse_index_data.csv")
-
-    # Process 'Date' column
-    nepse_index_df.rename(columns={'Date (AD)': 'Date'}, inplace=True)
-    nepse_index_df['Date'] = nepse_index_df['Date'].astype(str).str.strip()
-    nepse_index_df['Date'] = pd.to_datetime(nepse_index_df['Date'], format='mixed', errors='coerce')
-    nepse_index_df.dropna(subset=['Date'], inplace=True)
-    nepse_index_df = nepse_index_df[nepse_index_df['Date'] >= pd.to_datetime('2024-03-04')].copy()
-    nepse_index_df.sort_values('Date', inplace=True)
-    nepse_index_df['Date'] = nepse_index_df['Date'].dt.strftime('%Y-%m-%d')
-
-    nepse_combined_df['Date'] = pd.to_datetime(nepse_combined_df['Date'], format='%Y_%m_%d', errors='coerce')
-    nepse_combined_df.dropna(subset=['Date'], inplace=True)
-
-    nepse_combined_df.rename(columns={
-        'S.No': 'SerialNo',
-        'Symbol': 'Symbol',
-        'Conf.': 'Confidence',
-        'Open': 'OpenPrice',
-        'High': 'HighPrice',
-        'Low': 'LowPrice',
-        'Close': 'ClosePrice',
-        'VWAP': 'VWAP',
-        'Vol': 'Volume',
-        'Prev. Close': 'PrevClosePrice',
-        'Turnover': 'Turnover',
-        'Trans.': 'Transactions',
-        'Diff': 'Difference',
-        'Range': 'RangeValue',
-        'Diff %': 'DiffPercent',
-        'Range %': 'RangePercent',
-        'VWAP %': 'VWAPPercent',
-        '120 Days': '120Days',
-        '180 Days': '180Days',
-        '52 Weeks High': 'High_52Weeks',
-        '52 Weeks Low': 'Low_52Weeks',
-        'LTP': 'LastTradedPrice',
-        'Close - LTP': 'CloseMinusLTP',
-        'Close - LTP %': 'CloseMinusLTPPercent',
-        'Date': 'Date'
-    }, inplace=True)
-
-    # Drop rows where Symbol ends with 'P' or 'PO' (promoter shares)
-    nepse_combined_df = nepse_combined_df[~nepse_combined_df['Symbol'].str.endswith(('P', 'PO'))]
-    # Drop stocks whose Symbol ends with a number (mutual funds like BOKD86, EBLD86, etc.)
-    nepse_combined_df = nepse_combined_df[~nepse_combined_df['Symbol'].str.contains(r'\d$', na=False)]
-
-
-
-    # Convert to numeric
-    cols_to_numeric = [
-        'OpenPrice', 'HighPrice', 'LowPrice', 'ClosePrice', 'VWAP',
-        'Volume', 'PrevClosePrice', 'Turnover', 'Transactions',
-        'Difference', 'RangeValue', '120Days', '180Days',
-        'High_52Weeks', 'Low_52Weeks', 'LastTradedPrice'
-    ]
-    nepse_combined_df[cols_to_numeric] = nepse_combined_df[cols_to_numeric].apply(pd.to_numeric, errors='coerce')
-
-    # Drop unnecessary columns
-    nepse_combined_df.drop(columns=[
-        'Turnover', 'LastTradedPrice', 'CloseMinusLTP', 'CloseMinusLTPPercent', 'Volume'
-    ], inplace=True)
-
-    # Drop rows with missing core prices
-    nepse_combined_df = nepse_combined_df.dropna(subset=[
-        'OpenPrice', 'ClosePrice', 'HighPrice', 'LowPrice', 'VWAP'
-    ])
-
-    # Fill missing 120/180 day values group-wise
-    for col in ['120Days', '180Days']:
-        nepse_combined_df[col] = nepse_combined_df.groupby('Symbol')[col].transform(lambda x: x.fillna(x.median()))
-
-    # Sort and forward-fill prices
-    nepse_combined_df = nepse_combined_df.sort_values(by=['Symbol', 'Date'])
-    nepse_combined_df[['OpenPrice', 'ClosePrice']] = nepse_combined_df.groupby('Symbol')[['OpenPrice', 'ClosePrice']].ffill()
-
-    # Fill Transactions and PrevClosePrice
-    nepse_combined_df['Transactions'] = nepse_combined_df['Transactions'].fillna(0)
-    nepse_combined_df['PrevClosePrice'] = nepse_combined_df['PrevClosePrice'].fillna(nepse_combined_df['PrevClosePrice'].median())
-
-    # Fill more group-wise medians
-    nepse_combined_df['High_52Weeks'] = nepse_combined_df.groupby('Symbol')['High_52Weeks'].transform(lambda x: x.fillna(x.median()))
-
-    # Global median fallback
-    for col in ['120Days', '180Days', 'High_52Weeks']:
-        nepse_combined_df[col] = nepse_combined_df[col].fillna(nepse_combined_df[col].median())
-
-    # Missing % table
-    missing_percent = nepse_combined_df.isnull().mean() * 100
-    missing_table = pd.DataFrame({
-        'Column': missing_percent.index,
-        'Missing %': missing_percent.values
-    }).sort_values(by='Missing %', ascending=False).reset_index(drop=True)
-
-    # Drop rows with missing core prices
-    nepse_combined_df = nepse_combined_df.dropna(subset=[
-        'OpenPrice', 'ClosePrice', 'HighPrice', 'LowPrice', 'VWAP'
-    ])
-
-    # Sort and forward-fill prices
-    nepse_combined_df = nepse_combined_df.sort_values(by=['Symbol', 'Date'])
-    nepse_combined_df[['OpenPrice', 'ClosePrice']] = nepse_combined_df.groupby('Symbol')[['OpenPrice', 'ClosePrice']].ffill()
-
-    # Fill missing Transactions with 0 (assuming missing = no transaction)
-    nepse_combined_df['Transactions'] = nepse_combined_df['Transactions'].fillna(0)
-
-    # Fill PrevClosePrice with median (can also use group-wise)
-    nepse_combined_df['PrevClosePrice'] = nepse_combined_df['PrevClosePrice'].fillna(nepse_combined_df['PrevClosePrice'].median())
-
-    # Fill with group medians
-    nepse_combined_df['120Days'] = nepse_combined_df.groupby('Symbol')['120Days'].transform(lambda x: x.fillna(x.median()))
-    nepse_combined_df['180Days'] = nepse_combined_df.groupby('Symbol')['180Days'].transform(lambda x: x.fillna(x.median()))
-    nepse_combined_df['High_52Weeks'] = nepse_combined_df.groupby('Symbol')['High_52Weeks'].transform(lambda x: x.fillna(x.median()))
-
-    # Fill remaining NaNs with global median
-    nepse_combined_df['120Days'] = nepse_combined_df['120Days'].fillna(nepse_combined_df['120Days'].median())
-    nepse_combined_df['180Days'] = nepse_combined_df['180Days'].fillna(nepse_combined_df['180Days'].median())
-    nepse_combined_df['High_52Weeks'] = nepse_combined_df['High_52Weeks'].fillna(nepse_combined_df['High_52Weeks'].median())
-
-
-    return nepse_combined_df, nepse_index_df, missing_table
 
+# Opt-in profiling: ?profile=1 (or NEPSE_PROFILE=1) records timings and cache hits and
+# shows the Diagnostics tab; 'memory' also traces peak allocations
+profile_mode = st.query_params.get("profile", os.environ.get("NEPSE_PROFILE", "0"))
+profiler = start_profiling(profile_mode in ("1", "memory"), trace_memory=profile_mode == "memory")
+@profiled_cache(st.cache_resource(max_entries=2))
+def load_data(compact=False):
+    # One read-only dataset per mode, shared by every session instead of a pickled copy each
+    # Served from the snapshot when the CSVs are unchanged, appended days are ingested incrementally
+    with span("refresh_store"):
+        nepse_combined_df, nepse_index_df, missing_table = refresh_store(STOCK_DATA_CSV, INDEX_DATA_CSV)
+
+    # Categorical symbols/groups, float32 prices and integer counts
+    if compact:
+        with span("compact_frame"):
+            compact_df = compact_frame(nepse_combined_df)
+        memory_table = memory_report(nepse_combined_df, compact_df)
+        nepse_combined_df = compact_df
+    else:
+        memory_table = memory_report(nepse_combined_df, nepse_combined_df)
+
+    # Derived once here so no tab depends on another tab having run first
+    nepse_combined_df = add_derived_columns(nepse_combined_df)
+
+    # Key for every cached computation below, so they invalidate with the data
+    data_version = f"{snapshot_version() or time.time_ns()}-{'compact' if compact else 'full'}"
+
+    # The symbol index shares the frozen frame, so per-symbol lookups are plain slices
+    with span("share_dataset"):
+        return share_dataset(nepse_combined_df, nepse_index_df, missing_table, memory_table, data_version)
+
+
+# Analytics are cached per (data version, parameters); the frame and index are passed
+# unhashed since the data version already identifies them. Artifacts written by
+# precompute.py for the same data are read instead of recomputed when present.
+# Matplotlib charts are cached as rendered PNG bytes, so a rerun never redraws or
+# rasterizes an unchanged figure
+
+def windowed(data_version):
+    # Versions of a date-range window carry the range after an '@'
+    return '@' in data_version
+
+
+def stored_artifact(name, data_version):
+    # Artifacts cover the full history only
+    return None if windowed(data_version) else read_artifact(name)
+
+
+@profiled_cache(st.cache_resource(max_entries=2))
+def cached_date_index(_df, data_version):
+    return DateIndex(_df)
+
+
+@profiled_cache(st.cache_resource(max_entries=2))
+def cached_window(_df, _index_df, data_version, start, end):
+    # The chosen date range of both frames, sliced through their date indexes
+    # Shared across sessions like the full dataset, so read-only as well
+    frame = read_only_frame(cached_date_index(_df, data_version).rows(start, end))
+    index_df = read_only_frame(DateIndex(_index_df).rows(start, end))
+    return frame, index_df, SymbolIndex(frame), f"{data_version}@{start:%Y%m%d}-{end:%Y%m%d}"
+
+
+@profiled_cache(st.cache_resource(max_entries=2))
+def cached_features(_df, _symbol_index, data_version):
+    # Per-symbol aggregates, persisted next to the snapshot under the data version
+    if windowed(data_version):
+        return compute_features(symbol_index=_symbol_index)
+    features = read_artifact('features')
+    if features is None:
+        features = load_feature_table(_df, data_version=data_version, symbol_index=_symbol_index)
+    return features
+
+
+@profiled_cache(st.cache_data(max_entries=4))
+def cached_volatility_plot(_df, _symbol_index, data_version, top_n=20):
+    features = cached_features(_df, _symbol_index, data_version)
+    return render_figure(calculate_volatility_plot(_df, top_n=top_n, features=features))
+
+
+@profiled_cache(st.cache_resource(max_entries=2))
+def cached_sector_engine(_symbol_index, data_version):
+    # Sector codes and per-date sector aggregates, built once per data version
+    return SectorEngine(symbol_index=_symbol_index)
+
+
+@profiled_cache(st.cache_resource(max_entries=16))
+def cached_sector_heatmap(_symbol_index, data_version, start, end=None):
+    return plot_sector_heatmap(cached_sector_engine(_symbol_index, data_version), start, end)
+
+
+@profiled_cache(st.cache_data(max_entries=2))
+def cached_market_breadth(_symbol_index, data_version):
+    sector_daily = stored_artifact('sector_daily', data_version)
+    if sector_daily is None:
+        return cached_sector_engine(_symbol_index, data_version).market_breadth()
+    breadth = sector_daily.groupby('Date')[['Symbols', 'Advancers', 'Decliners', 'Unchanged', 'Turnover']].sum()
+    breadth['Breadth'] = (breadth['Advancers'] - breadth['Decliners']) / breadth['Symbols']
+    return breadth.reset_index()
+
+
+@profiled_cache(st.cache_data(max_entries=32))
+def cached_volatility_trend(_df, _symbol_index, data_version, symbols, backend, date_range=None):
+    return render_figure(plot_volatility_trend(_df, list(symbols), symbol_index=_symbol_index, backend=backend, date_range=date_range))
+
+
+@profiled_cache(st.cache_resource(max_entries=4))
+def cached_cluster_sweep(_df, _symbol_index, data_version, feature_cols, use_std):
+    # k = 2..10 fitted in parallel once; the slider only picks a model
+    if tuple(feature_cols) == CLUSTER_FEATURES:
+        suffix = '_std' if use_std else ''
+        table, scores = stored_artifact(f'clusters{suffix}', data_version), stored_artifact(f'cluster_scores{suffix}', data_version)
+        if table is not None and scores is not None:
+            return ClusterSweep.from_frames(table, scores)
+    features = cached_features(_df, _symbol_index, data_version)
+    return ClusterSweep(_df, feature_cols, use_std=use_std, features=features)
+
+
+@profiled_cache(st.cache_data(max_entries=32))
+def cached_stock_clusters(_df, _symbol_index, data_version, feature_cols, k, use_std):
+    sweep = cached_cluster_sweep(_df, _symbol_index, data_version, feature_cols, use_std)
+    fig, df_cluster = plot_stock_clusters(_df, feature_cols, k=k, use_std=use_std, sweep=sweep)
+    return render_figure(fig), df_cluster
+
+
+@profiled_cache(st.cache_data(max_entries=32))
+def cached_closing_price_trend(_df, _symbol_index, data_version, symbols, backend, date_range=None):
+    return render_figure(plot_closing_price_trend(_df, list(symbols), symbol_index=_symbol_index, backend=backend, date_range=date_range))
+
+
+@profiled_cache(st.cache_resource(max_entries=2))
+def cached_correlation_engine(_df, data_version):
+    returns, matrix = stored_artifact('returns', data_version), stored_artifact('correlation', data_version)
+    if returns is not None and matrix is not None:
+        return CorrelationEngine(None, returns=returns, matrix=matrix)
+    return CorrelationEngine(_df)
+
+
+@profiled_cache(st.cache_data(max_entries=4))
+def cached_correlation(_df, data_version):
+    corr_matrix = stored_artifact('sector_correlation', data_version)
+    if corr_matrix is None:
+        corr_matrix, fig = correlation_stock_price(_df, engine=cached_correlation_engine(_df, data_version))
+    else:
+        corr_matrix, fig = correlation_stock_price(_df, corr_matrix=corr_matrix)
+    return corr_matrix, render_figure(fig)
+
+
+@profiled_cache(st.cache_data(max_entries=256))
+def cached_top_correlated(_engine, data_version, symbol, k):
+    return _engine.top_k(symbol, k)
+
+
+@profiled_cache(st.cache_data(max_entries=32))
+def cached_correlated_pairs(_engine, data_version, threshold):
+    return _engine.pairs_above(threshold, absolute=True)
+
+
+@profiled_cache(st.cache_resource(max_entries=2))
+def cached_rolling_states(_df, _index_df, data_version):
+    # Persisted window sums, fed only the days added since they were last saved; a
+    # date-range window is built from its own history and never saved
+    if windowed(data_version):
+        history = market_return_matrix(_df, _index_df)
+        return {window: RollingCorrelation.from_history(*history, window) for window in WINDOWS}
+    return sync_rolling_states(_df, _index_df)
+
+
+@profiled_cache(st.cache_resource(max_entries=2))
+def cached_market_returns(_df, _index_df, data_version):
+    return market_return_matrix(_df, _index_df)
+
+
+@profiled_cache(st.cache_data(max_entries=128))
+def cached_rolling_pair(_df, _index_df, data_version, symbol, other, window):
+    matrix, dates, columns, spans = cached_market_returns(_df, _index_df, data_version)
+    x = matrix[:, columns.get_loc(symbol)]
+    # Against the index, the symbol is paired with the index over its own return spans
+    y = spans[:, columns.get_loc(symbol)] if other == INDEX_COLUMN else matrix[:, columns.get_loc(other)]
+    corr, cov = rolling_stats(x[:, None], y, window)
+    return pd.DataFrame({'Correlation': corr[:, 0], 'Covariance': cov[:, 0]}, index=dates)
+
+
+@profiled_cache(st.cache_resource(max_entries=2))
+def cached_market_relative(_df, _index_df, data_version):
+    # Shares the return matrix with the rolling correlation view
+    return MarketRelative(matrix=cached_market_returns(_df, _index_df, data_version))
+
+
+@profiled_cache(st.cache_data(max_entries=4))
+def cached_market_table(_market, data_version):
+    return _market.table()
+
+
+@profiled_cache(st.cache_resource(max_entries=64))
+def cached_candlestick(_df, _symbol_index, data_version, symbol, date_range=None, freq='auto'):
+    if freq == 'auto':
+        freq = visible_frequency(_symbol_index.get(symbol), date_range)
+    bars = cached_bars(_symbol_index, data_version, symbol, freq)
+    return plot_candlestick(_df, symbol, symbol_index=_symbol_index, date_range=date_range, freq=freq, bars=bars)
+
+
+@profiled_cache(st.cache_data(max_entries=256))
+def cached_bars(_symbol_index, data_version, symbol, freq):
+    # Full-history bars per (symbol, bar size); zooming only filters them
+    return resample_ohlc(symbol_index=_symbol_index, freq=freq, symbols=[symbol])
+
+
+@profiled_cache(st.cache_resource(max_entries=2))
+def cached_indicators(_symbol_index, data_version):
+    # Every indicator for every symbol in one pass; rows keep the (Symbol, Date) order,
+    # so an index over them slices per symbol like the data itself
+    return SymbolIndex(compute_indicators(symbol_index=_symbol_index))
+
+
+@profiled_cache(st.cache_data(max_entries=256))
+def cached_trend_signals(_symbol_index, data_version, symbol):
+    stock_data = _symbol_index.get(symbol)
+    indicator_rows = cached_indicators(_symbol_index, data_version).get(symbol)
+    return detect_trend(indicator_rows, ma_column=TREND_MA), get_price_trend_slope(stock_data)
+
+
+@profiled_cache(st.cache_data(max_entries=4))
+def cached_trend_screener(_symbol_index, data_version):
+    screener = stored_artifact('trend_screener', data_version)
+    if screener is None:
+        indicators = cached_indicators(_symbol_index, data_version).frame
+        screener = screen_trends(symbol_index=_symbol_index, indicators=indicators)
+    return screener
+
+
+@profiled_cache(st.cache_data(max_entries=4))
+def cached_backtest(_symbol_index, data_version):
+    # Every signal on every symbol and day, symbol chunks spread across cores
+    summary, periods = stored_artifact('backtest', data_version), stored_artifact('backtest_periods', data_version)
+    if summary is not None and periods is not None:
+        return summary, periods
+    indicators = cached_indicators(_symbol_index, data_version).frame
+    return backtest_signals(symbol_index=_symbol_index, indicators=indicators)
+
+
+@profiled_cache(st.cache_resource(max_entries=2))
+def cached_batch_projections(_symbol_index, data_version):
+    # Every symbol's degree-2 trend in one stacked solve
+    summary, projections = stored_artifact('projection_summary', data_version), stored_artifact('projections', data_version)
+    if summary is not None and projections is not None:
+        return summary, projections
+    return batch_projections(symbol_index=_symbol_index)
+
+
+@profiled_cache(st.cache_resource(max_entries=64))
+def cached_future_projection(_symbol_index, data_version, symbol):
+    projection = cached_batch_projections(_symbol_index, data_version)
+    return plot_future_projection(_symbol_index.get(symbol), symbol, projection=projection)
+
+
+compact_mode = st.sidebar.toggle(
+    "Compact memory mode",
+    value=os.environ.get("NEPSE_COMPACT", "0") == "1",
+    help="Categorical symbols, float32 prices and integer counts. Roughly halves the in-memory frame."
+)
+lazy_tabs = st.sidebar.toggle(
+    "Render active view only",
+    value=os.environ.get("NEPSE_LAZY_TABS", "0") == "1",
+    help="Replaces the tabs with a view selector so only the selected view is computed on each rerun."
+)
+
+interactive_charts = st.sidebar.toggle(
+    "Interactive line charts",
+    value=os.environ.get("NEPSE_PLOTLY", "0") == "1",
+    help="Draws the closing price and volatility trends with Plotly (WebGL) instead of static images."
+)
+chart_backend = 'plotly' if interactive_charts else 'matplotlib'
+
+
+def show_figure(output):
+    # PNG bytes from the render cache, or a Plotly figure
+    if isinstance(output, bytes):
+        st.image(output, use_container_width=True)
+    else:
+        st.plotly_chart(output, use_container_width=True)
 
 # Load data
-nepse_combined_df, nepse_index_df, missing_table = load_data()
-
-tabs = st.tabs([
-    "🗃️ Data Overview", 
-    "🔺 Top 20 Volatile", 
-    "🔥 Sector Heatmap", 
-    "📈 Volatility Trend", 
-    "🔍 Clustering", 
-    "📊 Closing Price Trend", 
-    "📉 Correlation Matrix", 
-    "🕯️ Candlestick Chart",
-    "🔮 Stock Trend Prediction",
-])
+nepse_combined_df, nepse_index_df, missing_table, symbol_index, memory_table, data_version = load_data(compact_mode).view()
+
+
+def date_range_filter(date_index):
+    # None means the whole history
+    first, last = date_index.first.date(), date_index.last.date()
+    if first == last:
+        return None
+    start, end = st.sidebar.slider(
+        "Date range",
+        min_value=first,
+        max_value=last,
+        value=(first, last),
+        key='analysis_range',
+        help="Limits every view to these trading days."
+    )
+    return None if date_index.is_full(start, end) else (pd.Timestamp(start), pd.Timestamp(end))
+
+
+# Every view below works on the chosen window, under its own data version
+analysis_range = date_range_filter(cached_date_index(nepse_combined_df, data_version))
+if analysis_range is not None:
+    nepse_combined_df, nepse_index_df, symbol_index, data_version = cached_window(nepse_combined_df, nepse_index_df, data_version, *analysis_range)
+
+
+def default_symbols(preferred=('BHL',)):
+    # A window can leave out the usual default; fall back to its first symbol
+    return [s for s in preferred if s in symbol_index] or list(symbol_index.symbols[:1])
+
+
+def zoom_range(key):
+    # Long histories are downsampled to the chart width; narrowing the range brings
+    # back full detail for the visible days. None means the whole history
+    first, last = nepse_combined_df['Date'].min().date(), nepse_combined_df['Date'].max().date()
+    if first == last:
+        return None
+    date_range = st.slider("Visible range", min_value=first, max_value=last, value=(first, last), key=key)
+    return None if date_range == (first, last) else date_range
+
 
 # 1. Data Overview
-with tabs[0]:
+def render_data_overview():
     # Display data
     st.subheader("NEPSE Combined Stock Data")
     st.dataframe(nepse_combined_df.head())
@@ -166,65 +367,97 @@ with tabs[0]:
     st.subheader("📊 Missing Value Percentage (NEPSE Combined)")
     st.dataframe(missing_table)
 
-with tabs[1]:
+    st.subheader("💾 Memory per Column" + (" (Compact Mode)" if compact_mode else ""))
+    st.dataframe(memory_table.style.format({
+        'Before (bytes)': '{:,.0f}',
+        'After (bytes)': '{:,.0f}',
+        'Saved %': '{:.1f}'
+    }, na_rep='-'))
+
+
+# 2. Top 20 Volatile
+def render_top_volatile():
     # Plot the Volatility of top 20 symbols
     st.subheader("🔺 Top 20 Most Volatile Symbols")
 
-    fig_vol = calculate_volatility_plot(nepse_combined_df)
+    fig_vol = cached_volatility_plot(nepse_combined_df, symbol_index, data_version)
 
     left_col, center_col, right_col = st.columns([1, 3, 1])  
     with center_col:
-        st.pyplot(fig_vol)
+        show_figure(fig_vol)
 
 
 # 3. Heatmap by Sector
-with tabs[2]:
+def render_sector_heatmap():
     # HeatMap of NEPSE Stocks by Sector
     st.subheader("🔥 NEPSE Stock Heatmap by Sector")
-    fig = plot_stock_heatmap(nepse_combined_df)
+    engine = cached_sector_engine(symbol_index, data_version)
+    trading_dates = list(engine.dates)
+    # A single day, or drag the ends apart for the change over a date range
+    start, end = st.select_slider(
+        "Trading days",
+        options=trading_dates,
+        value=(trading_dates[-1], trading_dates[-1]),
+        format_func=lambda d: f"{d:%Y-%m-%d}",
+        key='heatmap_dates'
+    )
+    fig = cached_sector_heatmap(symbol_index, data_version, start, None if end == start else end)
     st.plotly_chart(fig, use_container_width=True)
 
+    st.subheader("🏦 Sector Returns and Breadth")
+    st.dataframe(engine.sector_summary(start, end), hide_index=True)
+
+    breadth = cached_market_breadth(symbol_index, data_version)
+    st.line_chart(breadth.set_index('Date')['Breadth'])
+
 
 # 4. Volatility Trend
-with tabs[3]:
+def render_volatility_trend():
     # Daily Volatility Trend Comparison
     st.subheader("📈 Volatility Trend Comparison")
 
-    selected_symbols = st.multiselect("Select Symbols", sorted(nepse_combined_df['Symbol'].unique()), default=['BHL'])
+    selected_symbols = st.multiselect("Select Symbols", symbol_index.symbols, default=default_symbols())
+    date_range = zoom_range('volatility_zoom')
 
     if selected_symbols:
-        fig_vol_trend = plot_volatility_trend(nepse_combined_df, selected_symbols)
+        fig_vol_trend = cached_volatility_trend(nepse_combined_df, symbol_index, data_version, tuple(selected_symbols), chart_backend, date_range)
         if fig_vol_trend:
             left_col, center_col, right_col = st.columns([1, 3, 1])  
             with center_col:
-                    st.pyplot(fig_vol_trend)
+                    show_figure(fig_vol_trend)
 
 
 # Clustering and PCA Visualization
 
 # 5. Clustering
-with tabs[4]:
-    # Cluster feature set to be used externally
-    cluster_features = [
-        'DiffPercent',
-        'RangePercent',
-        'VWAPPercent',
-        'Volatility',
-        'Transactions',
-        'ClosePrice'
-    ]
+def render_clustering():
+    cluster_features = CLUSTER_FEATURES
 
     st.subheader("🔍 NEPSE Stock Clustering")
 
-    k_val = st.slider("Number of clusters (k)", min_value=2, max_value=10, value=3)
     use_std = st.checkbox("Include Std Deviation of Close Price")
+    sweep = cached_cluster_sweep(nepse_combined_df, symbol_index, data_version, cluster_features, use_std)
+
+    # Only the k values the sweep could fit (at most one per symbol) are offered
+    if not sweep.labels:
+        st.info("Clustering needs at least two symbols with complete features.")
+        return
+    k_min, k_max = min(sweep.labels), max(sweep.labels)
+    if k_min < k_max:
+        k_val = st.slider("Number of clusters (k)", min_value=k_min, max_value=k_max, value=sweep.recommended_k)
+    else:
+        k_val = k_min
+    st.caption(f"Recommended k: {sweep.recommended_k} (highest silhouette score)")
 
-    from stock_clusters import plot_stock_clusters  # local import is fine here
-
-    fig_cluster, df_cluster = plot_stock_clusters(nepse_combined_df, cluster_features.copy(), k=k_val, use_std=use_std)
+    fig_cluster, df_cluster = cached_stock_clusters(nepse_combined_df, symbol_index, data_version, cluster_features, k_val, use_std)
     left_col, center_col, right_col = st.columns([1, 3, 1])  
     with center_col:
-        st.pyplot(fig_cluster)
+        show_figure(fig_cluster)
+
+    with st.expander(f"Model selection scores (k = {k_min}..{k_max})"):
+        st.line_chart(sweep.scores[['Silhouette']])
+        st.line_chart(sweep.scores[['Inertia']])
+        st.dataframe(sweep.scores.style.format({'Inertia': '{:,.1f}', 'Silhouette': '{:.3f}'}))
 
     # Dispaly the Stocks Based on Clusters
     st.subheader("📌 Stocks per Cluster")
@@ -233,74 +466,153 @@ with tabs[4]:
         with st.expander(f"Cluster {cluster_id} ({len(symbols)} stocks)"):
             st.write(', '.join(symbols))
 
+
 # 6. Closing Price Trend
-with tabs[5]:
+def render_closing_price_trend():
     # Display the closing price trend for selected symbols
     st.subheader("📈 Closing Price Trend")
 
     selected_symbols = st.multiselect(
         "Select Stocks",
-        options=sorted(nepse_combined_df['Symbol'].unique()),
-        default=['BHL'],
+        options=symbol_index.symbols,
+        default=default_symbols(),
         key='close_price_trend'
     )
+    date_range = zoom_range('close_price_zoom')
     left_col, center_col, right_col = st.columns([1, 3, 1])  
     with center_col:
-        plot_closing_price_trend(nepse_combined_df, selected_symbols)
+        fig = cached_closing_price_trend(nepse_combined_df, symbol_index, data_version, tuple(selected_symbols), chart_backend, date_range)
+        if fig:
+            show_figure(fig)
 
 
 # 7. Correlation Matrix
-with tabs[6]:
-    # Correlation of Stock Price
-    st.subheader("📊 Correlation Matrix")
+def render_correlation():
+    # Correlation of daily returns, summarized by sector
+    st.subheader("📊 Sector Correlation Matrix")
 
-    corr_matrix, fig = correlation_stock_price(nepse_combined_df)
+    corr_matrix, fig = cached_correlation(nepse_combined_df, data_version)
+    engine = cached_correlation_engine(nepse_combined_df, data_version)
 
     # Display the heatmap figure
     left_col, center_col, right_col = st.columns([1, 3, 1])  
     with center_col:
-        st.pyplot(fig)
+        show_figure(fig)
+
+    # Most correlated stocks for a single symbol
+    st.subheader("🔗 Most Correlated Stocks")
+    corr_symbol = st.selectbox("Symbol", symbol_index.symbols, key='corr_symbol')
+    top_k = st.slider("Number of stocks", min_value=5, max_value=50, value=10, key='corr_top_k')
+    st.dataframe(cached_top_correlated(engine, data_version, corr_symbol, top_k).style.format({"Correlation": "{:.3f}"}))
+
+    # Strongly correlated pairs across the market
+    st.subheader("🧩 Highly Correlated Pairs")
+    threshold = st.slider("Minimum |correlation|", min_value=0.5, max_value=1.0, value=0.8, step=0.05, key='corr_threshold')
+    pairs = cached_correlated_pairs(engine, data_version, threshold)
+    st.write(f"{len(pairs)} pairs with at least {engine.min_overlap} overlapping trading days")
+    st.dataframe(pairs.style.format({"Correlation": "{:.3f}"}))
+
+    # Time-varying correlation over a trailing window
+    st.subheader("📈 Rolling Correlation")
+    window = st.radio("Window (trading days)", WINDOWS, index=1, horizontal=True, key='rolling_window')
+    other = st.selectbox("Compare against", [INDEX_COLUMN] + symbol_index.symbols, key='rolling_other')
+    rolling = cached_rolling_pair(nepse_combined_df, nepse_index_df, data_version, corr_symbol, other, window)
+    st.line_chart(rolling['Correlation'])
+
+    states = cached_rolling_states(nepse_combined_df, nepse_index_df, data_version)
+    latest = states[window].against_index().sort_values('Correlation', ascending=False)
+    st.write(f"Current {window}-day correlation with {INDEX_COLUMN} (as of {states[window].last_date:%Y-%m-%d})")
+    st.dataframe(latest.style.format({"Correlation": "{:.3f}", "Covariance": "{:.2e}"}))
+
+
+# 8. Market Relative
+def render_market_relative():
+    # Every symbol against the NEPSE index over the shared trading days
+    st.subheader("📐 Beta and Relative Strength vs NEPSE")
+
+    market = cached_market_relative(nepse_combined_df, nepse_index_df, data_version)
+    table = cached_market_table(market, data_version)
+    st.dataframe(
+        table.sort_values('Relative Strength %', ascending=False).style.format({
+            'Beta': '{:.2f}', 'Alpha %/yr': '{:.2f}', 'Correlation': '{:.3f}', 'R²': '{:.3f}',
+            'Relative Strength %': '{:.2f}', **{c: '{:.2f}' for c in table.columns if c.startswith('Beta ')}
+        }, na_rep='-'),
+        hide_index=True
+    )
 
-    # Optionally, display the correlation matrix as a table
-    st.dataframe(corr_matrix)
+    symbol = st.selectbox("Symbol", list(market.symbols), key='market_symbol')
+    window = st.radio("Rolling beta window (trading days)", WINDOWS, index=1, horizontal=True, key='beta_window')
+    st.write(f"Rolling {window}-day beta of {symbol}")
+    st.line_chart(market.rolling(symbol, window))
+    st.write(f"Growth of 1 in {symbol} and {INDEX_COLUMN}, and their ratio")
+    st.line_chart(market.relative_strength(symbol))
 
 
-# 8. Candlestick Chart
-with tabs[7]:
+# 9. Candlestick Chart
+def render_candlestick():
     st.subheader("📈 Individual Stock Candlestick Chart")
 
-    selected_symbol = st.selectbox("Selected Stock Symbol", options=sorted(nepse_combined_df['Symbol'].unique()), index=0)
+    selected_symbol = st.selectbox("Selected Stock Symbol", options=symbol_index.symbols, index=0)
+    date_range = zoom_range('candlestick_zoom')
+    bar_size = st.radio(
+        "Bar size",
+        ['auto'] + list(FREQUENCIES),
+        format_func=lambda freq: FREQUENCIES.get(freq, 'Auto'),
+        horizontal=True,
+        key='candlestick_bar_size'
+    )
 
-    fig = plot_candlestick(nepse_combined_df, selected_symbol)
+    fig = cached_candlestick(nepse_combined_df, symbol_index, data_version, selected_symbol, date_range, bar_size)
     if fig:
         st.plotly_chart(fig)
     else:
         st.write(f"No data available for symbol {selected_symbol}.")
 
 
-# Display the stock future trend
-with tabs[8]:
+# 10. Stock Trend Prediction
+def render_trend_prediction():
     st.subheader("🔮 Stock Trend Prediction (Visual + Heuristic)")
 
-    symbol = st.selectbox("Select symbol", nepse_combined_df['Symbol'].unique())
-
-    stock_data = nepse_combined_df[nepse_combined_df['Symbol'] == symbol].sort_values('Date')
+    symbol = st.selectbox("Select symbol", symbol_index.symbols)
 
-    trend_signal = detect_trend(stock_data)
-    trend_slope_text, slope_value = get_price_trend_slope(stock_data)
+    trend_signal, (trend_slope_text, slope_value) = cached_trend_signals(symbol_index, data_version, symbol)
 
     st.markdown(f"**Current Trend Based on 120-Day MA:** {trend_signal}")
     st.markdown(f"**Recent Price Slope (30 days):** {trend_slope_text} (slope: `{slope_value:.4f}`)")
 
+    indicator_rows = cached_indicators(symbol_index, data_version).get(symbol).set_index('Date')
+    st.line_chart(indicator_rows[['ClosePrice'] + [f'SMA{w}' for w in SMA_WINDOWS] + ['BollingerUpper', 'BollingerLower']])
+    st.line_chart(indicator_rows[[f'RSI{RSI_WINDOW}']])
+    st.dataframe(indicator_rows.drop(columns='Symbol').tail(1), hide_index=True)
+
+    # Whole-market view of the same signals, one vectorized pass
+    st.subheader("📋 Market Trend Screener")
+    screener = cached_trend_screener(symbol_index, data_version)
+    st.dataframe(
+        screener.sort_values('Slope %/day', ascending=False).style.format({
+            'ClosePrice': '{:.2f}', 'Slope': '{:.4f}', 'Slope %/day': '{:.3f}',
+            '120Days': '{:.2f}', TREND_MA: '{:.2f}', 'MA Gap %': '{:.2f}', f'RSI{RSI_WINDOW}': '{:.1f}'
+        }, na_rep='-'),
+        hide_index=True
+    )
+
+    # How often the same signals were right in the past, judged HORIZON trading days later
+    st.subheader(f"🎯 Signal Backtest ({HORIZON}-Day Horizon)")
+    backtest, backtest_periods = cached_backtest(symbol_index, data_version)
+    st.line_chart(backtest_periods.set_index('Period')[[f'{name} Hit %' for name in SIGNALS]])
+    percent_columns = [c for c in backtest.columns if c.endswith('%')]
+    st.dataframe(
+        backtest.sort_values('Projection MAE %').style.format({c: '{:.2f}' for c in percent_columns}, na_rep='-'),
+        hide_index=True
+    )
 
     # Project Future Prices
 
     st.subheader("📈 Next 10-Day Price Projection (Linear Trend)")
 
-    symbol = st.selectbox("Select stock symbol", nepse_combined_df['Symbol'].unique())
-    stock_data = nepse_combined_df[nepse_combined_df['Symbol'] == symbol]
+    symbol = st.selectbox("Select stock symbol", symbol_index.symbols)
 
-    fig, future_dates, y_pred = plot_future_projection(stock_data, symbol)
+    fig, future_dates, y_pred = cached_future_projection(symbol_index, data_version, symbol)
 
     st.plotly_chart(fig)
 
@@ -308,4 +620,90 @@ with tabs[8]:
         "Date": future_dates,
         "Projected Price": y_pred
     })
-    st.dataframe(proj_df.style.format({"Projected Price": "{:.2f}"}))
\ No newline at end of file
+    st.dataframe(proj_df.style.format({"Projected Price": "{:.2f}"}))
+
+    # Market-wide projections from the same cached batch fit
+    st.subheader("🚀 Projected Movers (Next 10 Days)")
+    summary, projections = cached_batch_projections(symbol_index, data_version)
+    movers = summary[['Symbol', 'LastDate', 'LastClose', 'FinalProjection', 'Projected Change %']]
+    st.dataframe(
+        movers.sort_values('Projected Change %', ascending=False).style.format({
+            'LastClose': '{:.2f}', 'FinalProjection': '{:.2f}', 'Projected Change %': '{:.2f}'
+        }),
+        hide_index=True
+    )
+    st.download_button(
+        "Download all projections (CSV)",
+        projections.to_csv(index=False),
+        file_name="nepse_projections.csv",
+        mime="text/csv"
+    )
+
+
+# 11. Diagnostics (only with profiling on)
+PROFILE_HISTORY_RUNS = 50
+
+def render_diagnostics():
+    st.subheader("🩺 Diagnostics")
+
+    # Spans finished so far in this run; views drawn after this one show up next run
+    st.write(f"Current run ({profiler.run_id})" + (" with allocation tracing" if profiler.trace_memory else ""))
+    st.dataframe(records_table(profiler.finished_records()).drop(columns=['run', 'parent', 'depth', 'started']).style.format({
+        'wall_ms': '{:,.1f}',
+        'cpu_ms': '{:,.1f}',
+        'rows': '{:,.0f}',
+        'peak_bytes': '{:,.0f}'
+    }, na_rep='-'))
+
+    history = st.session_state.get("profile_history", [])
+    records = [record for run in history for record in run]
+    st.write(f"Last {len(history)} runs in this session")
+    st.dataframe(summarize(records).style.format({
+        'MeanWallMs': '{:,.1f}',
+        'MaxWallMs': '{:,.1f}',
+        'MeanCpuMs': '{:,.1f}',
+        'MaxPeakBytes': '{:,.0f}'
+    }, na_rep='-'))
+
+    st.download_button(
+        "Download as JSON lines",
+        data=records_to_jsonl(records + profiler.finished_records()),
+        file_name="nepse_profile.jsonl",
+        mime="application/jsonl"
+    )
+
+
+views = [
+    ("🗃️ Data Overview", render_data_overview),
+    ("🔺 Top 20 Volatile", render_top_volatile),
+    ("🔥 Sector Heatmap", render_sector_heatmap),
+    ("📈 Volatility Trend", render_volatility_trend),
+    ("🔍 Clustering", render_clustering),
+    ("📊 Closing Price Trend", render_closing_price_trend),
+    ("📉 Correlation Matrix", render_correlation),
+    ("📐 Market Relative", render_market_relative),
+    ("🕯️ Candlestick Chart", render_candlestick),
+    ("🔮 Stock Trend Prediction", render_trend_prediction),
+]
+if profiler is not None:
+    views.append(("🩺 Diagnostics", render_diagnostics))
+view_labels = [label for label, _ in views]
+
+if lazy_tabs:
+    # Only the selected view runs, so widget latency is that view's cost alone
+    active_view = st.radio("View", view_labels, horizontal=True, label_visibility="collapsed")
+    with span(f"tab.{active_view}"):
+        dict(views)[active_view]()
+else:
+    # st.tabs runs every body on each rerun; the caches keep the inactive ones cheap
+    for tab, (label, render_view) in zip(st.tabs(view_labels), views):
+        with tab, span(f"tab.{label}"):
+            render_view()
+
+if profiler is not None:
+    profiler.stop()
+    history = st.session_state.setdefault("profile_history", [])
+    history.append(profiler.records)
+    del history[:-PROFILE_HISTORY_RUNS]
+    if os.environ.get("NEPSE_PROFILE_LOG"):
+        append_jsonl(profiler, os.environ["NEPSE_PROFILE_LOG"])
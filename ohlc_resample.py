@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from symbol_index import SymbolIndex
+from downsample import DEFAULT_BARS, visible_rows
+
+# 'D' keeps daily rows, 'W' groups Sunday-Thursday trading weeks, 'M' calendar months;
+# an integer N groups every N trading days of a symbol
+FREQUENCIES = {'D': 'Daily', 'W': 'Weekly', 'M': 'Monthly'}
+# 1970-01-01 was a Thursday, so this shift starts weeks on Sunday
+WEEK_SHIFT = 4
+
+
+def _bar_ids(frame, symbol_index, freq):
+    dates = frame['Date'].to_numpy().astype('datetime64[D]')
+    if freq == 'D':
+        return dates.astype(np.int64)
+    if freq == 'W':
+        return (dates.astype(np.int64) + WEEK_SHIFT) // 7
+    if freq == 'M':
+        return dates.astype('datetime64[M]').astype(np.int64)
+    if isinstance(freq, (int, np.integer)) and freq > 0:
+        offsets = np.arange(len(frame)) - np.repeat(symbol_index.starts, symbol_index.ends - symbol_index.starts)
+        return offsets // freq
+    raise ValueError(f"Unknown bar frequency: {freq}")
+
+
+def _share_volume(frame, vwap):
+    if 'Volume' in frame.columns:
+        weights = frame['Volume'].to_numpy(dtype=np.float64)
+    elif 'Turnover' in frame.columns:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weights = frame['Turnover'].to_numpy(dtype=np.float64) / vwap
+    else:
+        weights = frame['Transactions'].to_numpy(dtype=np.float64)
+    # Rows without a usable volume carry no weight
+    return np.where(np.isfinite(weights) & (weights > 0), weights, 0.0)
+
+
+def resample_ohlc(df=None, symbol_index=None, freq='W', symbols=None):
+    # First open, highest high, lowest low, last close, summed transactions and a
+    # VWAP weighted by shares traded: Volume when loaded, otherwise Turnover / VWAP
+    # (the cleaned data drops Volume), and Transactions only when neither exists
+    if symbol_index is None:
+        symbol_index = SymbolIndex(df)
+    if symbols is not None:
+        symbol_index = SymbolIndex(symbol_index.select(symbols))
+    frame = symbol_index.frame
+    if frame.empty:
+        return pd.DataFrame(columns=['Symbol', 'Date', 'EndDate', 'OpenPrice', 'HighPrice', 'LowPrice',
+                                     'ClosePrice', 'VWAP', 'Transactions', 'Days'])
+
+    # A bar starts at every symbol boundary and every change of bar id
+    bar_ids = _bar_ids(frame, symbol_index, freq)
+    new_bar = np.ones(len(frame), dtype=bool)
+    new_bar[1:] = bar_ids[1:] != bar_ids[:-1]
+    new_bar[symbol_index.starts] = True
+    starts = np.flatnonzero(new_bar)
+    ends = np.append(starts[1:], len(frame)) - 1
+
+    vwap = frame['VWAP'].to_numpy(dtype=np.float64)
+    weights = _share_volume(frame, vwap)
+    weighted = np.add.reduceat(vwap * weights, starts)
+    total_weight = np.add.reduceat(weights, starts)
+    days = ends - starts + 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Days without trades carry no weight; fall back to a plain average
+        bar_vwap = np.where(total_weight > 0, weighted / total_weight, np.add.reduceat(vwap, starts) / days)
+
+    dates = frame['Date'].to_numpy()
+    return pd.DataFrame({
+        'Symbol': frame['Symbol'].to_numpy()[starts],
+        'Date': dates[starts],
+        'EndDate': dates[ends],
+        'OpenPrice': frame['OpenPrice'].to_numpy()[starts],
+        'HighPrice': np.maximum.reduceat(frame['HighPrice'].to_numpy(), starts),
+        'LowPrice': np.minimum.reduceat(frame['LowPrice'].to_numpy(), starts),
+        'ClosePrice': frame['ClosePrice'].to_numpy()[ends],
+        'VWAP': bar_vwap,
+        'Transactions': np.add.reduceat(frame['Transactions'].to_numpy(dtype=np.float64), starts),
+        'Days': days,
+    })
+
+
+def bar_frequency(first_date, last_date, trading_days, max_bars=DEFAULT_BARS):
+    # Finest bar size that keeps the visible range within max_bars candles
+    if trading_days <= max_bars:
+        return 'D'
+    span_days = (pd.Timestamp(last_date) - pd.Timestamp(first_date)).days + 1
+    if span_days / 7 <= max_bars:
+        return 'W'
+    return 'M'
+
+
+def visible_frequency(stock_data, date_range=None, max_bars=DEFAULT_BARS):
+    rows = visible_rows(stock_data, date_range)
+    if rows.empty:
+        return 'D'
+    return bar_frequency(rows['Date'].iloc[0], rows['Date'].iloc[-1], len(rows), max_bars)
+
+
+def frequency_label(freq):
+    return FREQUENCIES.get(freq, f"{freq}-Day")
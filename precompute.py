@@ -0,0 +1,180 @@
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+from joblib import Parallel, delayed
+
+from data_snapshot import SNAPSHOT_DIR, load_table, snapshot_version
+from incremental_ingest import refresh_store, STOCK_DATA_CSV, INDEX_DATA_CSV
+from symbol_index import SymbolIndex
+from shared_dataset import add_derived_columns
+from symbol_to_group import symbol_to_group
+from sector_engine import SectorEngine
+from feature_store import compute_features
+from cluster_service import CLUSTER_FEATURES, ClusterSweep
+from correlation_engine import CorrelationEngine
+from rolling_correlation import sync_rolling_states
+from trend_screener import screen_trends
+from indicators import compute_indicators
+from project_future_prices import batch_projections
+from backtest import backtest_signals
+
+ARTIFACT_DIR = "artifacts"
+ARTIFACT_MANIFEST = "manifest.json"
+
+
+def artifact_dir(snapshot_dir=SNAPSHOT_DIR):
+    return os.path.join(snapshot_dir, ARTIFACT_DIR)
+
+
+def _load_dataset(snapshot_dir):
+    nepse_combined_df = add_derived_columns(load_table('stock', snapshot_dir))
+    nepse_index_df = load_table('index', snapshot_dir)
+    return SymbolIndex(nepse_combined_df), nepse_index_df
+
+
+# Each job reads the cleaned snapshot itself and returns named tables, so jobs share
+# nothing and run in separate processes
+
+def features_job(symbol_index, nepse_index_df, snapshot_dir):
+    features = compute_features(symbol_index=symbol_index)
+    ranking = features[['Symbol', 'VolatilityMean']].sort_values('VolatilityMean', ascending=False)
+    return {'features': features, 'volatility_ranking': ranking.reset_index(drop=True)}
+
+
+def heatmap_job(symbol_index, nepse_index_df, snapshot_dir):
+    # Every date's sector returns, breadth and turnover
+    return {'sector_daily': SectorEngine(symbol_index=symbol_index).daily}
+
+
+def correlation_job(symbol_index, nepse_index_df, snapshot_dir):
+    engine = CorrelationEngine(symbol_index.frame)
+    return {
+        'returns': engine.return_frame(),
+        'correlation': engine.correlation_matrix(),
+        'sector_correlation': engine.sector_block_matrix(symbol_to_group),
+    }
+
+
+def cluster_job(symbol_index, nepse_index_df, snapshot_dir):
+    tables = {}
+    for use_std, suffix in ((False, ''), (True, '_std')):
+        sweep = ClusterSweep(symbol_index.frame, CLUSTER_FEATURES, use_std=use_std, n_jobs=1)
+        tables[f'clusters{suffix}'], tables[f'cluster_scores{suffix}'] = sweep.to_frames()
+    return tables
+
+
+def trend_job(symbol_index, nepse_index_df, snapshot_dir):
+    summary, projections = batch_projections(symbol_index=symbol_index)
+    indicators = compute_indicators(symbol_index=symbol_index)
+    # Jobs already run in parallel, so the backtest's symbol chunks run in this process
+    backtest, backtest_periods = backtest_signals(symbol_index=symbol_index, indicators=indicators, n_jobs=1)
+    return {
+        'trend_screener': screen_trends(symbol_index=symbol_index, indicators=indicators),
+        'projection_summary': summary,
+        'projections': projections,
+        'backtest': backtest,
+        'backtest_periods': backtest_periods,
+    }
+
+
+def rolling_job(symbol_index, nepse_index_df, snapshot_dir):
+    # Window states are persisted next to the snapshot by sync_rolling_states itself
+    sync_rolling_states(symbol_index.frame, nepse_index_df, snapshot_dir=snapshot_dir)
+    return {}
+
+
+ARTIFACT_JOBS = {
+    'features': features_job,
+    'heatmap': heatmap_job,
+    'correlation': correlation_job,
+    'clusters': cluster_job,
+    'trend': trend_job,
+    'rolling': rolling_job,
+}
+
+
+def _run_job(job, snapshot_dir):
+    start = time.perf_counter()
+    symbol_index, nepse_index_df = _load_dataset(snapshot_dir)
+    tables = ARTIFACT_JOBS[job](symbol_index, nepse_index_df, snapshot_dir)
+
+    written = {}
+    out_dir = artifact_dir(snapshot_dir)
+    for name, table in tables.items():
+        path = os.path.join(out_dir, f"{name}.parquet")
+        table.to_parquet(path + ".tmp")
+        os.replace(path + ".tmp", path)
+        written[name] = {'file': os.path.basename(path), 'rows': len(table), 'job': job}
+    return job, written, time.perf_counter() - start
+
+
+def precompute(stock_path=STOCK_DATA_CSV, index_path=INDEX_DATA_CSV, snapshot_dir=SNAPSHOT_DIR, jobs=None, n_jobs=-1):
+    # Cleaned data first (snapshot + incremental ingest), then every derived artifact
+    # in parallel; the manifest is written last and ties them to the data version
+    jobs = list(jobs or ARTIFACT_JOBS)
+    unknown = [job for job in jobs if job not in ARTIFACT_JOBS]
+    if unknown:
+        raise ValueError(f"Unknown jobs {unknown}; expected some of {list(ARTIFACT_JOBS)}")
+
+    refresh_store(stock_path, index_path, snapshot_dir)
+    version = snapshot_version(snapshot_dir)
+
+    # Artifacts of jobs not rerun stay valid if they were built from the same data
+    previous = read_manifest(snapshot_dir)
+    artifacts = {name: entry for name, entry in previous['artifacts'].items() if entry['job'] not in jobs} if previous else {}
+
+    out_dir = artifact_dir(snapshot_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, ARTIFACT_MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    results = Parallel(n_jobs=n_jobs)(delayed(_run_job)(job, snapshot_dir) for job in jobs)
+
+    for job, written, seconds in results:
+        print(f"{job:<12} {seconds * 1000:9.1f} ms  {', '.join(written) or '-'}")
+        for name, entry in written.items():
+            artifacts[name] = dict(entry, seconds=seconds)
+
+    manifest = {
+        'snapshot_version': version,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'artifacts': artifacts,
+    }
+    with open(manifest_path + ".tmp", 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return manifest
+
+
+def read_manifest(snapshot_dir=SNAPSHOT_DIR):
+    # Only a manifest built from the current snapshot counts
+    path = os.path.join(artifact_dir(snapshot_dir), ARTIFACT_MANIFEST)
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('snapshot_version') != snapshot_version(snapshot_dir):
+        return None
+    return manifest
+
+
+def read_artifact(name, snapshot_dir=SNAPSHOT_DIR):
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None or name not in manifest['artifacts']:
+        return None
+    try:
+        return pd.read_parquet(os.path.join(artifact_dir(snapshot_dir), manifest['artifacts'][name]['file']))
+    except (OSError, ValueError):
+        return None
+
+
+if __name__ == '__main__':
+    # Usage: python precompute.py [job ...]
+    manifest = precompute(jobs=sys.argv[1:] or None)
+    print(f"{len(manifest['artifacts'])} artifacts for data version {manifest['snapshot_version']}")
@@ -1,37 +1,79 @@
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures # Import PolynomialFeatures
+from symbol_index import SymbolIndex
+from trend_screener import last_window_positions
 
-def plot_future_projection(stock_data, symbol, lookback_days=30, forward_days=10):
-    stock_data = stock_data.sort_values('Date').copy()
-    recent_data = stock_data[-lookback_days:].reset_index(drop=True)
+def batch_projections(df=None, symbol_index=None, lookback_days=30, forward_days=10, degree=2):
+    if symbol_index is None:
+        symbol_index = SymbolIndex(df)
+    frame = symbol_index.frame
+    symbols = np.array(symbol_index.symbols, dtype=object)
+
+    positions, valid = last_window_positions(symbol_index, lookback_days)
+    days = frame['Date'].to_numpy().astype('datetime64[D]').astype(np.int64)[positions]
+    closes = frame['ClosePrice'].to_numpy(dtype=np.float64)[positions]
+
+    # Day offsets from each symbol's first date in the window, like the per-symbol fit
+    first_day = np.where(valid, days, np.iinfo(np.int64).max).min(axis=1)
+    x = np.where(valid, days - first_day[:, None], 0).astype(np.float64)
+    last_x = x.max(axis=1)
 
-    # Create numerical X based on actual date offsets (in days)
-    recent_data['DayIndex'] = (recent_data['Date'] - recent_data['Date'].min()).dt.days
-    X = recent_data['DayIndex'].values.reshape(-1, 1)
-    y = recent_data['ClosePrice'].values.reshape(-1, 1)
+    # Scaling x keeps the normal equations well conditioned; predictions are unchanged
+    scale = np.maximum(last_x, 1.0)
+    powers = np.arange(degree + 1)
+    design = (x / scale[:, None])[:, :, None] ** powers
+    design = np.where(valid[:, :, None], design, 0)
+    targets = np.where(valid, closes, 0)
 
-    degree = 2 
+    # One stacked least-squares solve for every symbol (minimum-norm when underdetermined)
+    coefs = np.einsum('spw,sw->sp', np.linalg.pinv(design), targets)
 
-    poly = PolynomialFeatures(degree=degree)
-    X_poly = poly.fit_transform(X)
+    future_x = last_x[:, None] + np.arange(1, forward_days + 1)[None, :]
+    projected = (((future_x / scale[:, None])[:, :, None] ** powers) * coefs[:, None, :]).sum(axis=2)
 
-    # Fit model using polynomial features
-    model = LinearRegression().fit(X_poly, y)
+    # Same business-day calendar as pd.date_range(..., freq='B')[1:]
+    last_dates = frame['Date'].to_numpy().astype('datetime64[D]')[symbol_index.ends - 1]
+    future_dates = np.busday_offset(last_dates[:, None], np.arange(1, forward_days + 1)[None, :], roll='forward')
 
-    # Prepare future X
-    last_day_index = X[-1][0]
-    future_day_indices = np.arange(last_day_index + 1, last_day_index + forward_days + 1).reshape(-1, 1)
-    
-    # Transform future X for prediction using the same polynomial features
-    future_day_indices_poly = poly.transform(future_day_indices)
-    
-    # Predict future prices
-    y_future = model.predict(future_day_indices_poly)
+    last_close = closes[:, -1]
+    summary = pd.DataFrame({
+        'Symbol': symbols,
+        'WindowStart': pd.to_datetime(first_day.astype('datetime64[D]')),
+        'LastDate': pd.to_datetime(last_dates),
+        'LastClose': last_close,
+        'Scale': scale,
+        'FinalProjection': projected[:, -1],
+        'Projected Change %': (projected[:, -1] / last_close - 1) * 100,
+    })
+    for p in powers:
+        summary[f'Coef{p}'] = coefs[:, p]
 
-    future_dates = pd.date_range(start=recent_data['Date'].iloc[-1], periods=forward_days + 1, freq='B')[1:]
+    projections = pd.DataFrame({
+        'Symbol': np.repeat(symbols, forward_days),
+        'Step': np.tile(np.arange(1, forward_days + 1), len(symbols)),
+        'Date': pd.to_datetime(future_dates.ravel()),
+        'Projected Price': projected.ravel(),
+    })
+    return summary, projections
+
+def plot_future_projection(stock_data, symbol, lookback_days=30, forward_days=10, projection=None, degree=2):
+    stock_data = stock_data.sort_values('Date')
+    recent_data = stock_data[-lookback_days:].reset_index(drop=True)
+
+    # Draw precomputed results when given, otherwise fit just this symbol
+    if projection is None:
+        projection = batch_projections(stock_data, lookback_days=lookback_days, forward_days=forward_days, degree=degree)
+    summary, projections = projection
+    fit = summary[summary['Symbol'] == symbol].iloc[0]
+    future = projections[projections['Symbol'] == symbol]
+
+    coef_cols = [c for c in summary.columns if c.startswith('Coef')]
+    coefs = fit[coef_cols].to_numpy(dtype=np.float64)
+    degree = len(coefs) - 1
+
+    future_dates = pd.DatetimeIndex(future['Date'])
+    y_future = future['Projected Price'].to_numpy()
 
     fig = go.Figure()
 
@@ -45,19 +87,19 @@ def plot_future_projection(stock_data, symbol, lookback_days=30, forward_days=10
 
     fig.add_trace(go.Scatter(
         x=future_dates,
-        y=y_future.flatten(),
+        y=y_future,
         mode='lines+markers',
         name=f'Projected Next {forward_days} Days (Poly Degree {degree})', # Updated name
         line=dict(color='orange', dash='dash')
     ))
 
-    X_plot_recent = np.arange(recent_data['DayIndex'].min(), recent_data['DayIndex'].max() + 1).reshape(-1, 1)
-    X_plot_recent_poly = poly.transform(X_plot_recent)
-    y_plot_recent_poly = model.predict(X_plot_recent_poly)
-    
+    # Fitted curve at every calendar day of the window
+    X_plot_recent = np.arange(0, (fit['LastDate'] - fit['WindowStart']).days + 1)
+    y_plot_recent_poly = np.polynomial.polynomial.polyval(X_plot_recent / fit['Scale'], coefs)
+
     fig.add_trace(go.Scatter(
-        x=recent_data['Date'].min() + pd.to_timedelta(X_plot_recent.flatten(), unit='D'),
-        y=y_plot_recent_poly.flatten(),
+        x=fit['WindowStart'] + pd.to_timedelta(X_plot_recent, unit='D'),
+        y=y_plot_recent_poly,
         mode='lines',
         name=f'Polynomial Fit (Degree {degree})',
         line=dict(color='green', dash='dot')
@@ -74,4 +116,4 @@ def plot_future_projection(stock_data, symbol, lookback_days=30, forward_days=10
         hovermode='x unified' # Added for better interactivity
     )
 
-    return fig, future_dates, y_future.flatten()
+    return fig, future_dates, y_future
@@ -0,0 +1,328 @@
+import glob
+import os
+import zipfile
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from correlation_engine import daily_return_matrix, previous_trade_codes
+from data_snapshot import SNAPSHOT_DIR
+
+WINDOWS = (20, 60, 120)
+INDEX_COLUMN = 'NEPSE'
+# Above this many series only correlations against the index are tracked (O(N) per day
+# instead of O(N^2) memory and update cost)
+PAIRWISE_LIMIT = 2000
+
+
+def index_return_series(nepse_index_df):
+    dates = pd.to_datetime(nepse_index_df['Date'])
+    if 'Percentage Change' in nepse_index_df.columns:
+        returns = pd.to_numeric(nepse_index_df['Percentage Change'], errors='coerce').to_numpy() / 100
+    else:
+        returns = pd.to_numeric(nepse_index_df['Index Value'], errors='coerce').pct_change().to_numpy()
+    return pd.Series(returns, index=dates).groupby(level=0).last().sort_index()
+
+
+def compounded_index_returns(index_returns, starts, ends):
+    # Index return over each (start, end] span of dates, compounded from the daily
+    # returns; NaN when there is no start, the end isn't an index day or a day inside
+    # the span has no return
+    growth = np.log1p(index_returns.to_numpy())
+    cumulative = np.concatenate([[0.0], np.cumsum(np.nan_to_num(growth))])
+    missing = np.concatenate([[0], np.cumsum(np.isnan(growth))])
+    index_dates = index_returns.index
+    end = index_dates.searchsorted(ends, side='right')
+    start = index_dates.searchsorted(starts, side='right')
+
+    spans = np.expm1(cumulative[end] - cumulative[start])
+    is_index_day = (end > 0) & (index_dates[np.maximum(end - 1, 0)] == ends)
+    spans[pd.isna(starts) | ~is_index_day | (missing[end] > missing[start])] = np.nan
+    return spans
+
+
+def market_return_matrix(df, nepse_index_df):
+    # Stock returns with the index's daily return appended as the last column. Each
+    # stock return runs from the symbol's previous traded day, so the last element is
+    # the index return compounded over that same span, per cell (the index column's own
+    # spans are its daily returns)
+    returns, dates, symbols = daily_return_matrix(df)
+    index_returns = index_return_series(nepse_index_df)
+    daily = index_returns.reindex(dates).to_numpy()
+
+    previous = previous_trade_codes(df)
+    starts = np.where(previous >= 0, dates.to_numpy()[np.maximum(previous, 0)], np.datetime64('NaT'))
+    ends = np.broadcast_to(dates.to_numpy()[:, None], previous.shape)
+    spans = compounded_index_returns(index_returns, starts.ravel(), ends.ravel()).reshape(previous.shape)
+
+    columns = symbols.append(pd.Index([INDEX_COLUMN]))
+    return np.column_stack([returns, daily]), dates, columns, np.column_stack([spans, daily])
+
+
+def _window_sums(values, window):
+    # Sum over each trailing window from one cumulative sum; rows before the first full
+    # window are NaN
+    cumulative = np.cumsum(np.concatenate([np.zeros((1,) + values.shape[1:]), values]), axis=0)
+    sums = np.full(values.shape, np.nan)
+    sums[window - 1:] = cumulative[window:] - cumulative[:-window]
+    return sums
+
+
+def _rolling_sums(x, y, window):
+    # Trailing-window counts and sums of x, y, x^2, y^2 and xy over the days where both
+    # traded; y is one column broadcast or a matrix of the same shape as x
+    x = np.asarray(x, dtype=np.float64)
+    y = np.broadcast_to(np.asarray(y, dtype=np.float64).reshape(len(x), -1), x.shape)
+
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    x0, y0 = np.where(valid, x, 0), np.where(valid, y, 0)
+
+    n = _window_sums(valid.astype(np.float64), window)
+    sx, sy = _window_sums(x0, window), _window_sums(y0, window)
+    sxx, syy = _window_sums(x0 * x0, window), _window_sums(y0 * y0, window)
+    sxy = _window_sums(x0 * y0, window)
+    return n, sx, sy, sxx, syy, sxy
+
+
+def rolling_stats(x, y, window, min_periods=None):
+    # Rolling correlation and sample covariance of every column of x against y
+    # (one column broadcast or a matrix of the same shape), using days where both traded
+    if min_periods is None:
+        min_periods = window // 2
+    n, sx, sy, sxx, syy, sxy = _rolling_sums(x, y, window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = (sxy - sx * sy / n) / (n - 1)
+        corr = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx ** 2) * (n * syy - sy ** 2))
+
+    too_short = ~(n >= min_periods)
+    cov[too_short] = np.nan
+    corr[too_short | ~np.isfinite(corr)] = np.nan
+    return np.clip(corr, -1, 1), cov
+
+
+def rolling_beta(x, y, window, min_periods=None):
+    # Rolling OLS slope of every column of x on y from the same window sums
+    if min_periods is None:
+        min_periods = window // 2
+    n, sx, sy, _, syy, sxy = _rolling_sums(x, y, window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = (n * sxy - sx * sy) / (n * syy - sy ** 2)
+
+    beta[~(n >= min_periods) | ~np.isfinite(beta)] = np.nan
+    return beta
+
+
+def rolling_against_index(df, nepse_index_df, window, min_periods=None):
+    matrix, dates, columns, spans = market_return_matrix(df, nepse_index_df)
+    corr, cov = rolling_stats(matrix[:, :-1], spans[:, :-1], window, min_periods)
+    symbols = columns[:-1]
+    return pd.DataFrame(corr, index=dates, columns=symbols), pd.DataFrame(cov, index=dates, columns=symbols)
+
+
+class RollingCorrelation:
+    # Running sums over the last `window` days, updated in O(N^2) (or O(N) against the
+    # index only) per new day instead of recomputing the window. Each day comes with the
+    # index return compounded over every column's own span, which is what that column
+    # is paired with against the index
+
+    REBUILD_EVERY = 1000
+
+    def __init__(self, columns, window, pairwise=None):
+        self.columns = pd.Index(columns)
+        self.window = window
+        self.pairwise = len(self.columns) <= PAIRWISE_LIMIT if pairwise is None else pairwise
+        self.last_date = None
+        self._rows = deque()
+        self._spans = deque()
+        self._dates = deque()
+        self._updates = 0
+        self._reset_sums()
+
+    def _reset_sums(self):
+        size = len(self.columns)
+        if self.pairwise:
+            # s_x[i, j] is the sum of column i over the days where both i and j traded
+            self._n = np.zeros((size, size))
+            self._sx = np.zeros((size, size))
+            self._sxx = np.zeros((size, size))
+            self._sxy = np.zeros((size, size))
+        # Sums of every column (x) against its compounded index (y)
+        self._index_sums = np.zeros((6, size))
+
+    def _apply(self, row, spans, sign):
+        valid = ~np.isnan(row)
+        x = np.where(valid, row, 0)
+        if self.pairwise:
+            m = valid.astype(np.float64)
+            self._n += sign * np.outer(m, m)
+            self._sx += sign * np.outer(x, m)
+            self._sxx += sign * np.outer(x * x, m)
+            self._sxy += sign * np.outer(x, x)
+
+        m = valid & ~np.isnan(spans)
+        x, y = np.where(m, x, 0), np.where(m, spans, 0)
+        self._index_sums += sign * np.array([m, x, y, x * x, y * y, x * y])
+
+    def update(self, date, row, spans):
+        row = np.asarray(row, dtype=np.float64)
+        spans = np.asarray(spans, dtype=np.float64)
+        if len(self._rows) == self.window:
+            self._apply(self._rows.popleft(), self._spans.popleft(), -1)
+            self._dates.popleft()
+        self._rows.append(row)
+        self._spans.append(spans)
+        self._dates.append(date)
+        self._apply(row, spans, +1)
+        self.last_date = pd.Timestamp(date)
+
+        # Add/subtract drifts slowly in floating point, so resum the window now and then
+        self._updates += 1
+        if self._updates % self.REBUILD_EVERY == 0:
+            self._reset_sums()
+            for buffered, spans in zip(self._rows, self._spans):
+                self._apply(buffered, spans, +1)
+
+    def _pair_sums(self):
+        n, sx, sy, sxx, syy, sxy = self._index_sums
+        if not self.pairwise:
+            return n, sx, sy, sxx, syy, sxy
+        sums = [a.copy() for a in (self._n, self._sx, self._sx.T, self._sxx, self._sxx.T, self._sxy)]
+        # Pairs with the index (last row and column) use each column's compounded index
+        for full, column, row in zip(sums, (n, sx, sy, sxx, syy, sxy), (n, sy, sx, syy, sxx, sxy)):
+            full[:, -1] = column
+            full[-1, :] = row
+        return sums
+
+    def covariance(self):
+        n, sx, sy, _, _, sxy = self._pair_sums()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = (sxy - sx * sy / n) / (n - 1)
+        return self._frame(cov)
+
+    def correlation(self, min_periods=None):
+        if min_periods is None:
+            min_periods = self.window // 2
+        n, sx, sy, sxx, syy, sxy = self._pair_sums()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx ** 2) * (n * syy - sy ** 2))
+        corr[(n < min_periods) | ~np.isfinite(corr)] = np.nan
+        return self._frame(np.clip(corr, -1, 1))
+
+    def _frame(self, values):
+        if self.pairwise:
+            return pd.DataFrame(values, index=self.columns, columns=self.columns)
+        return pd.Series(values, index=self.columns, name=INDEX_COLUMN)
+
+    def against_index(self, min_periods=None):
+        corr = self.correlation(min_periods)
+        cov = self.covariance()
+        if self.pairwise:
+            corr, cov = corr[INDEX_COLUMN], cov[INDEX_COLUMN]
+        return pd.DataFrame({'Correlation': corr, 'Covariance': cov}).drop(index=INDEX_COLUMN)
+
+    def save(self, path):
+        rows = np.array(self._rows) if self._rows else np.empty((0, len(self.columns)))
+        spans = np.array(self._spans) if self._spans else np.empty((0, len(self.columns)))
+        # Written aside and swapped in, so a reader never sees a half-written file
+        with open(path + ".tmp", 'wb') as f:
+            np.savez(
+                f, rows=rows, spans=spans, dates=np.array(self._dates, dtype='datetime64[ns]'),
+                columns=np.array(self.columns, dtype=str), window=self.window,
+                pairwise=self.pairwise, updates=self._updates
+            )
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            state = cls(data['columns'].tolist(), int(data['window']), bool(data['pairwise']))
+            # Replaying the buffered window restores the sums exactly
+            for date, row, spans in zip(data['dates'], data['rows'], data['spans']):
+                state.update(date, row, spans)
+            state._updates = int(data['updates'])
+        return state
+
+    @classmethod
+    def from_history(cls, matrix, dates, columns, spans, window, pairwise=None):
+        state = cls(columns, window, pairwise)
+        for date, row, span_row in zip(dates[-window:], matrix[-window:], spans[-window:]):
+            state.update(date, row, span_row)
+        return state
+
+
+def _state_path(window, snapshot_dir):
+    return os.path.join(snapshot_dir, f"rolling_{window}.npz")
+
+
+def _load_state(path):
+    # A missing, truncated or corrupt state file is rebuilt from history
+    try:
+        return RollingCorrelation.load(path)
+    except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile):
+        return None
+
+
+def clear_rolling_states(snapshot_dir=SNAPSHOT_DIR):
+    for path in glob.glob(os.path.join(snapshot_dir, "rolling_*.npz")):
+        os.remove(path)
+
+
+def new_return_rows(df, nepse_index_df, after, columns):
+    # Return rows for the days after `after` only; df must be sorted by (Symbol, Date)
+    # like the cleaned store, so each row's previous close is the row before it
+    dates = df['Date'].to_numpy()
+    positions = np.flatnonzero(dates > np.datetime64(after))
+    positions = positions[positions > 0]
+    if len(positions) == 0:
+        return np.empty((0, len(columns))), np.empty((0, len(columns))), pd.DatetimeIndex([])
+
+    symbols = df['Symbol'].to_numpy()
+    prices = df['ClosePrice'].to_numpy(dtype=np.float64)
+    same_symbol = symbols[positions] == symbols[positions - 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.where(same_symbol, prices[positions] / prices[positions - 1] - 1, np.nan)
+
+    new_dates, date_codes = np.unique(dates[positions], return_inverse=True)
+    column_codes = columns.get_indexer(pd.Index(symbols[positions]).astype(str))
+    index_returns = index_return_series(nepse_index_df)
+    starts = np.where(same_symbol, dates[positions - 1], np.datetime64('NaT'))
+    row_spans = compounded_index_returns(index_returns, starts, dates[positions])
+
+    matrix = np.full((len(new_dates), len(columns)), np.nan)
+    spans = np.full((len(new_dates), len(columns)), np.nan)
+    known = column_codes >= 0
+    matrix[date_codes[known], column_codes[known]] = returns[known]
+    spans[date_codes[known], column_codes[known]] = row_spans[known]
+
+    new_dates = pd.DatetimeIndex(new_dates)
+    matrix[:, -1] = spans[:, -1] = index_returns.reindex(new_dates).to_numpy()
+    matrix[~np.isfinite(matrix)] = np.nan
+    return matrix, spans, new_dates
+
+
+def sync_rolling_states(df, nepse_index_df, windows=WINDOWS, snapshot_dir=SNAPSHOT_DIR):
+    # Bring the persisted window states up to the latest trading day, feeding them only
+    # the days they haven't seen; a changed symbol universe rebuilds from history
+    states = {}
+    history = None
+    symbols = pd.Index(pd.unique(df['Symbol'])).astype(str)
+    for window in windows:
+        path = _state_path(window, snapshot_dir)
+        state = _load_state(path)
+
+        if state is not None and state.columns[:-1].equals(symbols):
+            matrix, spans, dates = new_return_rows(df, nepse_index_df, state.last_date, state.columns)
+            for date, row, span_row in zip(dates, matrix, spans):
+                state.update(date, row, span_row)
+        else:
+            if history is None:
+                history = market_return_matrix(df, nepse_index_df)
+            state = RollingCorrelation.from_history(*history, window)
+
+        if os.path.isdir(snapshot_dir):
+            state.save(path)
+        states[window] = state
+    return states
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+from symbol_index import SymbolIndex
+from date_index import DateIndex
+from symbol_to_group import symbol_to_group
+
+SECTOR_COLUMNS = ['Date', 'Group', 'Symbols', 'Advancers', 'Decliners', 'Unchanged',
+                  'MeanChange', 'TurnoverWeightedChange', 'Turnover', 'Breadth']
+TILE_COLUMNS = ['Symbol', 'Group', 'DiffPercent', 'Turnover']
+
+
+def _turnover(frame):
+    if 'Turnover' not in frame.columns:
+        return np.zeros(len(frame))
+    return np.nan_to_num(frame['Turnover'].to_numpy(dtype=np.float64), nan=0.0)
+
+
+class SectorEngine:
+    # Sector codes assigned once per symbol, per-(date, sector) aggregates for every
+    # trading day and a date index over the rows, so any day or date range is a slice
+    # plus a few bincounts instead of a regroup of the full history
+
+    def __init__(self, df=None, symbol_index=None, group_map=symbol_to_group):
+        if symbol_index is None:
+            symbol_index = SymbolIndex(df)
+        self.symbol_index = symbol_index
+        frame = symbol_index.frame
+        lengths = symbol_index.ends - symbol_index.starts
+
+        # -1 marks symbols without a sector; they never reach a heatmap
+        sectors = pd.Index([str(s) for s in symbol_index.symbols]).map(group_map)
+        self.symbol_groups, self.groups = pd.factorize(sectors, sort=True)
+        self.group_codes = np.repeat(self.symbol_groups, lengths)
+        self.symbol_codes = np.repeat(np.arange(len(symbol_index)), lengths)
+
+        self.date_index = DateIndex(frame)
+        self.dates = self.date_index.dates
+        self.date_codes = self.date_index.row_codes()
+
+        self.change = frame['DiffPercent'].to_numpy(dtype=np.float64)
+        self.turnover = _turnover(frame)
+        self.close = frame['ClosePrice'].to_numpy(dtype=np.float64)
+        self.prev_close = frame['PrevClosePrice'].to_numpy(dtype=np.float64)
+        self.daily = self._daily_table()
+
+    def _daily_table(self):
+        n_groups = len(self.groups)
+        mapped = (self.group_codes >= 0) & np.isfinite(self.change)
+        key = self.date_codes[mapped] * n_groups + self.group_codes[mapped]
+        size = len(self.dates) * n_groups
+        change = self.change[mapped]
+        turnover = self.turnover[mapped]
+
+        def total(weights=None):
+            return np.bincount(key, weights=weights, minlength=size)
+
+        symbols = total()
+        traded = total(turnover)
+        present = symbols > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_change = total(change) / symbols
+            weighted_change = np.where(traded > 0, total(change * turnover) / traded, mean_change)
+        advancers = total((change > 0).astype(np.float64))
+        decliners = total((change < 0).astype(np.float64))
+
+        date_idx, group_idx = np.divmod(np.flatnonzero(present), n_groups)
+        table = pd.DataFrame({
+            'Date': self.dates[date_idx],
+            'Group': self.groups[group_idx],
+            'Symbols': symbols[present].astype(np.int64),
+            'Advancers': advancers[present].astype(np.int64),
+            'Decliners': decliners[present].astype(np.int64),
+            'Unchanged': (symbols - advancers - decliners)[present].astype(np.int64),
+            'MeanChange': mean_change[present],
+            'TurnoverWeightedChange': weighted_change[present],
+            'Turnover': traded[present],
+        })
+        table['Breadth'] = (table['Advancers'] - table['Decliners']) / table['Symbols']
+        return table
+
+    def date_code(self, date, side='right'):
+        # Latest trading day on or before `date` (side='right'), or the first on or after it
+        position = self.dates.searchsorted(pd.Timestamp(date), side=side)
+        return position - 1 if side == 'right' else position
+
+    def rows_on(self, date):
+        return self.date_index.positions(date, date)
+
+    def tiles(self, start, end=None):
+        # One row per sector-mapped symbol: its change over the range (a single day's
+        # DiffPercent when end is None) and the turnover traded in it
+        if end is None or pd.Timestamp(end) == pd.Timestamp(start):
+            rows = self.rows_on(start)
+            symbols, change, turnover = self.symbol_codes[rows], self.change[rows], self.turnover[rows]
+        else:
+            symbols, change, turnover = self._range_changes(start, end)
+
+        groups = self.symbol_groups[symbols]
+        keep = (groups >= 0) & np.isfinite(change)
+        return pd.DataFrame({
+            'Symbol': np.asarray(self.symbol_index.symbols, dtype=object)[symbols[keep]].astype(str),
+            'Group': self.groups[groups[keep]],
+            'DiffPercent': change[keep],
+            'Turnover': turnover[keep],
+        }, columns=TILE_COLUMNS)
+
+    def _range_changes(self, start, end):
+        first, last = self.date_code(start, side='left'), self.date_code(end)
+        n_symbols = len(self.symbol_index)
+        if first > last or n_symbols == 0:
+            return np.array([], dtype=np.int64), np.array([]), np.array([])
+
+        # Rows are sorted by (symbol, date), so this key is monotonic and each symbol's
+        # rows inside the range are one searchsorted window
+        stride = len(self.dates) + 1
+        key = self.symbol_codes * stride + self.date_codes
+        codes = np.arange(n_symbols)
+        lo = np.searchsorted(key, codes * stride + first, side='left')
+        hi = np.searchsorted(key, codes * stride + last, side='right')
+        traded = hi > lo
+        symbols, lo, hi = codes[traded], lo[traded], hi[traded]
+
+        # Change from the close before the range (or the first day's previous close)
+        # to the last close inside it
+        has_previous = lo > self.symbol_index.starts[symbols]
+        base = np.where(has_previous, self.close[np.maximum(lo - 1, 0)], self.prev_close[lo])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = (self.close[hi - 1] / base - 1) * 100
+
+        cumulative = np.concatenate([[0.0], np.cumsum(self.turnover)])
+        return symbols, change, cumulative[hi] - cumulative[lo]
+
+    def sector_summary(self, start, end=None):
+        # Per-sector returns and breadth for a day or a range, heaviest turnover first
+        if end is None or pd.Timestamp(end) == pd.Timestamp(start):
+            code = self.date_code(start)
+            table = self.daily[self.daily['Date'] == self.dates[code]] if code >= 0 else self.daily.iloc[0:0]
+            return table.drop(columns='Date').sort_values('Turnover', ascending=False).reset_index(drop=True)
+
+        tiles = self.tiles(start, end)
+        change = tiles['DiffPercent']
+        tiles = tiles.assign(Advancers=change > 0, Decliners=change < 0, Weighted=change * tiles['Turnover'])
+        table = tiles.groupby('Group', observed=True).agg(
+            Symbols=('Symbol', 'size'),
+            Advancers=('Advancers', 'sum'),
+            Decliners=('Decliners', 'sum'),
+            MeanChange=('DiffPercent', 'mean'),
+            Weighted=('Weighted', 'sum'),
+            Turnover=('Turnover', 'sum'),
+        ).reset_index()
+        table['Unchanged'] = table['Symbols'] - table['Advancers'] - table['Decliners']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table['TurnoverWeightedChange'] = np.where(table['Turnover'] > 0, table['Weighted'] / table['Turnover'], table['MeanChange'])
+        table['Breadth'] = (table['Advancers'] - table['Decliners']) / table['Symbols']
+        columns = [c for c in SECTOR_COLUMNS if c != 'Date']
+        return table[columns].sort_values('Turnover', ascending=False).reset_index(drop=True)
+
+    def market_breadth(self):
+        # Advancers and decliners across all sectors, one row per trading day
+        breadth = self.daily.groupby('Date')[['Symbols', 'Advancers', 'Decliners', 'Unchanged', 'Turnover']].sum()
+        breadth['Breadth'] = (breadth['Advancers'] - breadth['Decliners']) / breadth['Symbols']
+        return breadth.reset_index()
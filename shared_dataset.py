@@ -0,0 +1,58 @@
+from typing import NamedTuple
+
+import pandas as pd
+
+from symbol_index import SymbolIndex
+
+
+def add_derived_columns(df):
+    # Columns the analytics read but the export doesn't carry, computed once at load
+    # time so no analytic ever has to write into the shared frame
+    return df.assign(Volatility=df['HighPrice'] - df['LowPrice'])
+
+
+def read_only_column(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy(copy=True)
+        codes.flags.writeable = False
+        return pd.Categorical.from_codes(codes, dtype=series.dtype)
+    values = series.to_numpy(copy=True)
+    values.flags.writeable = False
+    return values
+
+
+def read_only_frame(df):
+    # One read-only array per column: any in-place write (df.loc[...] = ..., df[col] *= ...)
+    # raises instead of silently changing data other sessions are reading
+    columns = {col: read_only_column(df[col]) for col in df.columns}
+    return pd.DataFrame(columns, index=df.index, columns=df.columns, copy=False)
+
+
+class SharedDataset(NamedTuple):
+    # Loaded once per process and handed to every session as the same object; nothing
+    # in it can be modified in place, so sessions share it without copies
+    stock: pd.DataFrame
+    index: pd.DataFrame
+    missing: pd.DataFrame
+    symbol_index: SymbolIndex
+    memory: pd.DataFrame
+    version: str
+
+    def view(self):
+        # Shallow per-run frames over the shared arrays: a column added by one session
+        # stays in that session, and no data is copied
+        return self._replace(stock=self.stock.copy(deep=False), index=self.index.copy(deep=False))
+
+
+def read_only_stock(df):
+    # Sorted by (Symbol, Date) before freezing, so a symbol index built on the result
+    # uses the read-only frame itself
+    return read_only_frame(SymbolIndex(df).frame)
+
+
+def share_dataset(stock, index, missing, memory, version):
+    stock = read_only_stock(stock)
+    return SharedDataset(
+        stock, read_only_frame(index), read_only_frame(missing),
+        SymbolIndex(stock), read_only_frame(memory), version
+    )
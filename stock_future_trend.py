@@ -1,26 +1,29 @@
-def detect_trend(stock_data):
+import numpy as np
+
+def detect_trend(stock_data, ma_column='120Days'):
     
     latest_close = stock_data['ClosePrice'].iloc[-1]
-    latest_ma = stock_data['120Days'].iloc[-1]
+    latest_ma = stock_data[ma_column].iloc[-1]
 
-    if latest_close > latest_ma:
+    # A computed moving average is missing until the symbol has a full window
+    if np.isnan(latest_ma):
+        return "⏳ Not enough history"
+    elif latest_close > latest_ma:
         return "📈 Bullish"
     elif latest_close < latest_ma:
         return "📉 Bearish"
     else:
         return "⚖️ Neutral"
 
-from sklearn.linear_model import LinearRegression
-import numpy as np
+from trend_screener import ols_slopes
 
 def get_price_trend_slope(stock_data, window=30):
     
+    # Fewer than `window` rows is fine, the fit just uses what's there
     recent_data = stock_data[-window:]
-    X = np.arange(window).reshape(-1, 1)
-    y = recent_data['ClosePrice'].values.reshape(-1, 1)
+    y = recent_data['ClosePrice'].to_numpy(dtype=np.float64)
 
-    model = LinearRegression().fit(X, y)
-    slope = model.coef_[0][0]
+    slope = ols_slopes(y[None, :])[0]
 
     if slope > 0:
         return "📈 Uptrend (Bullish)", slope
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+
+class SymbolIndex:
+    # Rows sorted by (Symbol, Date) with the [start, end) offsets of every symbol's block,
+    # so a symbol lookup is a dict hit plus an iloc slice instead of a full-column scan
+
+    def __init__(self, df):
+        if not self._is_sorted(df):
+            df = df.sort_values(by=['Symbol', 'Date'], kind='stable')
+        self.frame = df
+
+        symbols = df['Symbol'].to_numpy()
+        boundaries = np.flatnonzero(symbols[1:] != symbols[:-1]) + 1
+        self.starts = np.r_[0, boundaries] if len(symbols) else np.array([], dtype=int)
+        self.ends = np.r_[boundaries, len(symbols)] if len(symbols) else np.array([], dtype=int)
+        self.symbols = list(symbols[self.starts])
+        self._offsets = {s: (int(a), int(b)) for s, a, b in zip(self.symbols, self.starts, self.ends)}
+
+    @staticmethod
+    def _is_sorted(df):
+        if not pd.Index(df['Symbol']).is_monotonic_increasing:
+            return False
+        symbols = df['Symbol'].to_numpy()
+        dates = df['Date'].to_numpy()
+        same_symbol = symbols[1:] == symbols[:-1]
+        return bool(np.all(dates[1:][same_symbol] >= dates[:-1][same_symbol]))
+
+    def __contains__(self, symbol):
+        return symbol in self._offsets
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def get(self, symbol):
+        start, end = self._offsets.get(symbol, (0, 0))
+        return self.frame.iloc[start:end]
+
+    def select(self, symbols):
+        # Blocks come back in index order, i.e. sorted by (Symbol, Date)
+        offsets = sorted(self._offsets[s] for s in set(symbols) if s in self._offsets)
+        if not offsets:
+            return self.frame.iloc[0:0]
+        positions = np.concatenate([np.arange(start, end) for start, end in offsets])
+        return self.frame.iloc[positions]
+
+
+def symbol_rows(df, symbols, symbol_index=None):
+    if isinstance(symbols, str):
+        symbols = [symbols]
+    if symbol_index is not None:
+        rows = symbol_index.select(symbols)
+    else:
+        rows = df[df['Symbol'].isin(symbols)].sort_values(['Symbol', 'Date'])
+    # A compact-mode categorical keeps every listed symbol as a category; plots colour
+    # and label by category, so only the selected ones are kept
+    if isinstance(rows['Symbol'].dtype, pd.CategoricalDtype):
+        rows = rows.assign(Symbol=rows['Symbol'].cat.remove_unused_categories())
+    return rows
@@ -0,0 +1,146 @@
+import itertools
+import os
+import string
+import sys
+
+import numpy as np
+import pandas as pd
+
+from cleaning_pipeline import COLUMN_NAMES, INDEX_START_DATE
+from symbol_to_group import symbol_to_group
+
+# 1x is roughly today's listed universe over one year of trading
+BASE_SYMBOLS = 250
+BASE_DAYS = 250
+# NEPSE trades Sunday to Thursday
+TRADING_WEEKMASK = 'Sun Mon Tue Wed Thu'
+# Share of extra symbols that the cleaning pipeline filters out
+PROMOTER_SHARE = 0.05
+MUTUAL_FUND_SHARE = 0.03
+# Chance a listed symbol has no trade on a given day
+NO_TRADE_RATE = 0.05
+# Chance a value is missing in the sparse columns of the export
+MISSING_RATES = {'Prev. Close': 0.02, 'Trans.': 0.02, '120 Days': 0.1, '180 Days': 0.1, '52 Weeks High': 0.1}
+# Symbols the dashboard selects by default
+DEFAULT_SYMBOLS = ['BHL']
+
+
+def _letter_names(count, taken):
+    # Extra tickers from letters only, never ending in 'P' so they survive the promoter filter
+    names = []
+    for length in itertools.count(3):
+        if len(names) >= count:
+            return names[:count]
+        for head in itertools.product(string.ascii_uppercase, repeat=length - 1):
+            for tail in string.ascii_uppercase.replace('P', ''):
+                name = ''.join(head) + tail
+                if name not in taken:
+                    names.append(name)
+            if len(names) >= count:
+                break
+
+
+def market_symbols(symbol_count, rng):
+    # Real listed symbols first, then generated ones, plus promoter and mutual-fund
+    # symbols that the pipeline is expected to drop
+    listed = [s for s in symbol_to_group if not s.endswith(('P', 'PO')) and not s[-1].isdigit()]
+    symbols = (DEFAULT_SYMBOLS + [s for s in listed if s not in DEFAULT_SYMBOLS])[:symbol_count]
+    symbols += _letter_names(symbol_count - len(symbols), set(symbols))
+
+    promoters = [f"{s}{rng.choice(['P', 'PO'])}" for s in rng.choice(symbols, int(symbol_count * PROMOTER_SHARE) or 1)]
+    funds = [f"{s}D{rng.integers(80, 90)}" for s in rng.choice(symbols, int(symbol_count * MUTUAL_FUND_SHARE) or 1)]
+    return sorted(set(symbols)) + sorted(set(promoters) | set(funds))
+
+
+def trading_days(day_count, start=INDEX_START_DATE):
+    return pd.bdate_range(start, periods=day_count, freq='C', weekmask=TRADING_WEEKMASK)
+
+
+def generate_market(symbol_count=BASE_SYMBOLS, day_count=BASE_DAYS, seed=0, start=INDEX_START_DATE):
+    # Raw exports in the same shape as nepse_combined_cleaned.csv and
+    # combined_nepse_index_data.csv
+    rng = np.random.default_rng(seed)
+    symbols = np.array(market_symbols(symbol_count, rng), dtype=object)
+    dates = trading_days(day_count, start)
+    n_symbols, n_days = len(symbols), len(dates)
+
+    # Correlated geometric random walks: a market factor plus idiosyncratic noise
+    market = rng.normal(0.0003, 0.01, n_days)
+    beta = rng.uniform(0.5, 1.5, n_symbols)
+    returns = market[:, None] * beta[None, :] + rng.normal(0, 0.015, (n_days, n_symbols))
+    closes = rng.uniform(100, 2000, n_symbols)[None, :] * np.exp(np.cumsum(returns, axis=0))
+    prev_closes = np.vstack([closes[:1] / np.exp(returns[:1]), closes[:-1]])
+
+    # Day-major, one row per (day, symbol) that traded
+    traded = rng.random((n_days, n_symbols)) >= NO_TRADE_RATE
+    day_idx, sym_idx = np.nonzero(traded)
+    close = closes[day_idx, sym_idx]
+    prev = prev_closes[day_idx, sym_idx]
+    n = len(close)
+
+    open_ = prev * (1 + rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, n))
+    vwap = (high + low + close) / 3
+    volume = rng.integers(100, 50000, n)
+    ma_120 = prev * rng.uniform(0.9, 1.1, n)
+
+    stock = pd.DataFrame({
+        'S.No': np.arange(1, n + 1),
+        'Symbol': symbols[sym_idx],
+        'Conf.': rng.uniform(30, 90, n).round(1),
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'VWAP': vwap,
+        'Vol': volume,
+        'Prev. Close': prev,
+        'Turnover': (volume * vwap).round(2),
+        'Trans.': rng.integers(1, 2000, n).astype(np.float64),
+        'Diff': close - prev,
+        'Range': high - low,
+        'Diff %': (close / prev - 1) * 100,
+        'Range %': (high / low - 1) * 100,
+        'VWAP %': (close / vwap - 1) * 100,
+        '120 Days': ma_120,
+        '180 Days': ma_120 * rng.uniform(0.95, 1.05, n),
+        '52 Weeks High': np.maximum(high, ma_120 * 1.3),
+        '52 Weeks Low': np.minimum(low, ma_120 * 0.7),
+        'LTP': close,
+        'Close - LTP': 0.0,
+        'Close - LTP %': 0.0,
+        'Date': pd.DatetimeIndex(dates[day_idx]).strftime('%Y_%m_%d'),
+    }, columns=list(COLUMN_NAMES))
+
+    for column, rate in MISSING_RATES.items():
+        stock.loc[rng.random(n) < rate, column] = np.nan
+
+    # The index export is newest first
+    index_value = 2000 * np.exp(np.cumsum(market))
+    previous = np.concatenate([[index_value[0] / np.exp(market[0])], index_value[:-1]])
+    index = pd.DataFrame({
+        'Date (AD)': dates.strftime('%Y-%m-%d'),
+        'Index Value': index_value.round(2),
+        'Absolute Change': (index_value - previous).round(2),
+        'Percentage Change': ((index_value / previous - 1) * 100).round(2),
+    }).iloc[::-1]
+    return stock, index
+
+
+def write_market(directory, symbol_count=BASE_SYMBOLS, day_count=BASE_DAYS, seed=0):
+    os.makedirs(directory, exist_ok=True)
+    stock, index = generate_market(symbol_count, day_count, seed)
+    stock_path = os.path.join(directory, 'nepse_combined_cleaned.csv')
+    index_path = os.path.join(directory, 'combined_nepse_index_data.csv')
+    stock.to_csv(stock_path, index=False)
+    index.to_csv(index_path, index=False)
+    return stock_path, index_path
+
+
+if __name__ == '__main__':
+    # Usage: python synthetic_data.py OUTPUT_DIR [symbol_scale] [day_scale]
+    symbol_scale = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    day_scale = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    paths = write_market(sys.argv[1], BASE_SYMBOLS * symbol_scale, BASE_DAYS * day_scale)
+    print(f"Wrote {paths[0]} and {paths[1]}")
@@ -0,0 +1,56 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from cleaning_pipeline import CLEANING_STAGES, COLUMN_NAMES, run_pipeline
+from synthetic_data import generate_market
+
+
+def _baseline_parse(path):
+    # The single read_csv the streaming parse replaced
+    df = pd.read_csv(path, low_memory=False)
+    df['Date'] = pd.to_datetime(df['Date'], format='%Y_%m_%d', errors='coerce')
+    df.dropna(subset=['Date'], inplace=True)
+    df.rename(columns=COLUMN_NAMES, inplace=True)
+    return df
+
+
+def _clean(raw, parse=None):
+    stages = CLEANING_STAGES if parse is None else [('parse', parse)] + CLEANING_STAGES[1:]
+    return run_pipeline(io.BytesIO(raw.to_csv(index=False).encode()), stages)[0]
+
+
+def _assert_same(raw):
+    streamed, baseline = _clean(raw), _clean(raw, _baseline_parse)
+    # Turnover may be int64 in the baseline; the streaming read always gives float64
+    pd.testing.assert_frame_equal(streamed, baseline, check_dtype=False)
+    assert streamed['Confidence'].dtype == baseline['Confidence'].dtype
+    return streamed
+
+
+def test_string_confidence_is_kept():
+    raw, _ = generate_market(symbol_count=10, day_count=30)
+    raw['Conf.'] = raw['Conf.'].astype(object)
+    raw.loc[raw.index[::7], 'Conf.'] = 'High'
+
+    streamed = _assert_same(raw)
+    assert (streamed['Confidence'] == 'High').any()
+    assert streamed['Confidence'].notna().all()
+
+
+def test_non_numeric_price_only_loses_that_cell():
+    raw, _ = generate_market(symbol_count=10, day_count=30)
+    raw['Conf.'] = raw['Conf.'].astype(object)
+    raw.loc[raw.index[::7], 'Conf.'] = 'High'
+    raw['Trans.'] = raw['Trans.'].astype(object)
+    raw.loc[raw.index[3], 'Trans.'] = 'n/a'
+
+    streamed = _assert_same(raw)
+    assert (streamed['Confidence'] == 'High').any()
+    assert np.issubdtype(streamed['Transactions'].dtype, np.floating)
+
+
+def test_numeric_export_matches_baseline():
+    raw, _ = generate_market(symbol_count=10, day_count=30)
+    assert np.issubdtype(_assert_same(raw)['Confidence'].dtype, np.floating)
@@ -0,0 +1,37 @@
+import os
+
+import pandas as pd
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from synthetic_data import write_market
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'nepse_dashboard.py')
+
+
+def _app(directory, monkeypatch):
+    # The dashboard reads the CSVs from the working directory; caches are per process
+    monkeypatch.chdir(directory)
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    at = AppTest.from_file(APP, default_timeout=240)
+    at.run()
+    assert not at.exception
+    return at
+
+
+def test_window_without_the_default_symbol(tmp_path, monkeypatch):
+    stock_path, _ = write_market(str(tmp_path), symbol_count=20, day_count=60)
+    stock = pd.read_csv(stock_path)
+    last_day = stock['Date'].max()
+    stock[~((stock['Symbol'] == 'BHL') & (stock['Date'] == last_day))].to_csv(stock_path, index=False)
+
+    at = _app(tmp_path, monkeypatch)
+    date_range = next(s for s in at.slider if s.label == 'Date range')
+    last = date_range.value[1]
+    date_range.set_range(last, last).run()
+
+    assert not at.exception
+    for label in ('Select Symbols', 'Select Stocks'):
+        selected = next(m for m in at.multiselect if m.label == label).value
+        assert selected and 'BHL' not in selected
@@ -0,0 +1,68 @@
+import os
+import shutil
+
+import pandas as pd
+
+import incremental_ingest
+from incremental_ingest import append_day_files, refresh_store
+from synthetic_data import write_market
+
+
+def _split_market(directory, head_days=30, day_count=40):
+    # The market up to `head_days`, plus one CSV per later day to append
+    stock_path, index_path = write_market(str(directory), symbol_count=15, day_count=day_count)
+    stock = pd.read_csv(stock_path)
+    dates = sorted(stock['Date'].unique())
+    stock[stock['Date'].isin(dates[:head_days])].to_csv(stock_path, index=False)
+    day_paths = []
+    for i, day in enumerate(dates[head_days:]):
+        day_paths.append(os.path.join(str(directory), f'day{i}.csv'))
+        stock[stock['Date'] == day].to_csv(day_paths[-1], index=False)
+    return stock_path, index_path, day_paths
+
+
+def _rebuilt(stock_path, index_path, snapshot_dir):
+    shutil.rmtree(snapshot_dir)
+    return refresh_store(stock_path, index_path, snapshot_dir)
+
+
+def _assert_same(frames, expected):
+    for frame, reference in zip(frames, expected):
+        pd.testing.assert_frame_equal(frame, reference)
+
+
+def test_rows_appended_during_a_build_are_ingested_later(tmp_path, monkeypatch):
+    stock_path, index_path, day_paths = _split_market(tmp_path)
+    snapshot_dir = str(tmp_path / 'snapshot')
+    run_pipeline = incremental_ingest.run_pipeline
+
+    def append_while_reading(source, stages):
+        # The daily append lands after the build fingerprinted the sources
+        append_day_files(day_paths[:1], stock_path)
+        return run_pipeline(source, stages)
+
+    monkeypatch.setattr(incremental_ingest, 'run_pipeline', append_while_reading)
+    built = refresh_store(stock_path, index_path, snapshot_dir)
+    monkeypatch.undo()
+    assert built[0]['Date'].nunique() == 30
+
+    frames = refresh_store(stock_path, index_path, snapshot_dir)
+    _assert_same(frames, _rebuilt(stock_path, index_path, snapshot_dir))
+
+
+def test_incremental_ingest_matches_a_full_rebuild(tmp_path, capsys):
+    stock_path, index_path, day_paths = _split_market(tmp_path)
+    snapshot_dir = str(tmp_path / 'snapshot')
+    refresh_store(stock_path, index_path, snapshot_dir)
+
+    # One day, then the rest in a single append
+    for ingested, appended in ((31, day_paths[:1]), (40, day_paths[1:])):
+        append_day_files(appended, stock_path)
+        report = []
+        frames = refresh_store(stock_path, index_path, snapshot_dir, report=report)
+        # Only the row stages run on an incremental ingest
+        assert [entry['stage'] for entry in report] == ['parse', 'filter', 'coerce']
+        assert frames[0]['Date'].nunique() == ingested
+
+    assert capsys.readouterr().out == ''
+    _assert_same(frames, _rebuilt(stock_path, index_path, snapshot_dir))
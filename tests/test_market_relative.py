@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from market_relative import MarketRelative
+
+
+def _market(seed=0, n_days=120, symbols=('AAA', 'BBB', 'CCC'), no_trade_rate=0.2):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2024-01-01', periods=n_days)
+    index_change = rng.normal(0, 0.01, n_days)
+    index_change[0] = 0
+    index_df = pd.DataFrame({'Date': dates, 'Percentage Change': index_change * 100})
+
+    rows = []
+    for symbol in symbols:
+        beta = rng.uniform(0.5, 1.5)
+        close = 100 * np.cumprod(1 + beta * index_change + rng.normal(0, 0.005, n_days))
+        traded = rng.random(n_days) > no_trade_rate
+        traded[[0, -1]] = True
+        rows.append(pd.DataFrame({'Symbol': symbol, 'Date': dates[traded], 'ClosePrice': close[traded]}))
+    return pd.concat(rows, ignore_index=True), index_df
+
+
+def _reference(df, index_df):
+    # Per symbol: returns between consecutive traded days against the index level over
+    # the same days
+    level = pd.Series(np.cumprod(1 + index_df['Percentage Change'].to_numpy() / 100), index=index_df['Date'])
+    reference = {}
+    for symbol, rows in df.groupby('Symbol'):
+        close = rows['ClosePrice'].to_numpy()
+        index_level = level.loc[rows['Date']].to_numpy()
+        x, y = close[1:] / close[:-1] - 1, index_level[1:] / index_level[:-1] - 1
+        relative_strength = (close[-1] / close[0]) / (index_level[-1] / index_level[0]) - 1
+        reference[symbol] = (np.polyfit(y, x, 1)[0], np.corrcoef(x, y)[0, 1], relative_strength * 100)
+    return reference
+
+
+def test_table_compounds_the_index_over_gap_days():
+    df, index_df = _market()
+    table = MarketRelative(df, index_df, min_overlap=5).table(windows=()).set_index('Symbol')
+
+    for symbol, (beta, corr, relative_strength) in _reference(df, index_df).items():
+        row = table.loc[symbol]
+        assert np.isclose(row['Beta'], beta)
+        assert np.isclose(row['Correlation'], corr)
+        assert np.isclose(row['Relative Strength %'], relative_strength)
+
+
+def test_rolling_beta_matches_full_period_beta():
+    df, index_df = _market(seed=1)
+    market = MarketRelative(df, index_df, min_overlap=5)
+    table = market.table(windows=()).set_index('Symbol')
+    rolling = market.rolling(['AAA', 'BBB'], window=len(market.dates), min_periods=5)
+
+    for symbol in ('AAA', 'BBB'):
+        assert np.isclose(rolling[symbol].iloc[-1], table.loc[symbol, 'Beta'])
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from ohlc_resample import resample_ohlc
+
+
+def test_bar_vwap_is_weighted_by_shares_traded():
+    # Cleaned data has no Volume column; shares come from Turnover / VWAP, so a bar's
+    # VWAP is its turnover over its shares whatever the trade counts were
+    vwap = np.array([100.0, 110.0, 120.0, 130.0])
+    shares = np.array([10.0, 1000.0, 50.0, 5.0])
+    df = pd.DataFrame({
+        'Symbol': 'AAA',
+        'Date': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04']),
+        'OpenPrice': vwap, 'HighPrice': vwap, 'LowPrice': vwap, 'ClosePrice': vwap,
+        'VWAP': vwap,
+        'Turnover': vwap * shares,
+        'Transactions': [500.0, 2.0, 40.0, 7.0],
+    })
+    bars = resample_ohlc(df, freq=2)
+    np.testing.assert_allclose(bars['VWAP'], [
+        (vwap[:2] * shares[:2]).sum() / shares[:2].sum(),
+        (vwap[2:] * shares[2:]).sum() / shares[2:].sum(),
+    ])
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from rolling_correlation import RollingCorrelation, _state_path, market_return_matrix, rolling_against_index, sync_rolling_states
+
+
+def _market(n_days=80, symbols=('AAA', 'BBB'), no_trade_rate=0.0):
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2024-01-01', periods=n_days)
+    index_change = rng.normal(0, 1, n_days)
+    index_df = pd.DataFrame({'Date': dates, 'Percentage Change': index_change})
+    rows = []
+    for symbol in symbols:
+        close = 100 * np.cumprod(1 + 0.008 * index_change + rng.normal(0, 0.005, n_days))
+        traded = rng.random(n_days) >= no_trade_rate
+        traded[[0, -1]] = True
+        rows.append(pd.DataFrame({'Symbol': symbol, 'Date': dates[traded], 'ClosePrice': close[traded]}))
+    return pd.concat(rows, ignore_index=True), index_df
+
+
+def _reference(df, index_df, window):
+    # Per symbol, over the last `window` days of the shared axis: returns between
+    # consecutive traded days against the index level over the same days
+    level = pd.Series(np.cumprod(1 + index_df['Percentage Change'].to_numpy() / 100), index=index_df['Date'])
+    axis = np.sort(df['Date'].unique())[-window:]
+    reference = {}
+    for symbol, rows in df.groupby('Symbol'):
+        close, index_level = rows['ClosePrice'].to_numpy(), level.loc[rows['Date']].to_numpy()
+        x, y = close[1:] / close[:-1] - 1, index_level[1:] / index_level[:-1] - 1
+        inside = np.isin(rows['Date'].to_numpy()[1:], axis)
+        reference[symbol] = (np.corrcoef(x[inside], y[inside])[0, 1], np.cov(x[inside], y[inside])[0, 1])
+    return pd.DataFrame(reference, index=['Correlation', 'Covariance']).T
+
+
+def test_unreadable_state_is_rebuilt(tmp_path):
+    df, index_df = _market()
+    expected = sync_rolling_states(df, index_df, windows=(20,), snapshot_dir=str(tmp_path))[20].against_index()
+
+    path = _state_path(20, str(tmp_path))
+    with open(path, 'rb') as f:
+        data = f.read()
+    for damaged in (data[:len(data) // 2], b''):
+        with open(path, 'wb') as f:
+            f.write(damaged)
+        state = sync_rolling_states(df, index_df, windows=(20,), snapshot_dir=str(tmp_path))[20]
+        pd.testing.assert_frame_equal(state.against_index(), expected)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['rolling_20.npz']
+
+
+def test_gapped_symbols_are_paired_with_the_index_over_their_spans(tmp_path):
+    df, index_df = _market(symbols=('AAA', 'BBB', 'CCC'), no_trade_rate=0.25)
+    expected = _reference(df, index_df, 20)
+
+    history = market_return_matrix(df, index_df)
+    for pairwise in (True, False):
+        state = RollingCorrelation.from_history(*history, 20, pairwise=pairwise)
+        pd.testing.assert_frame_equal(state.against_index(min_periods=2), expected, check_names=False)
+
+    corr, cov = rolling_against_index(df, index_df, 20, min_periods=2)
+    np.testing.assert_allclose(corr.iloc[-1].to_numpy(), expected['Correlation'].to_numpy())
+
+    # Days fed one at a time to a saved state give the same sums as a rebuild
+    cut = np.sort(df['Date'].unique())[-10]
+    sync_rolling_states(df[df['Date'] < cut], index_df, windows=(20,), snapshot_dir=str(tmp_path))
+    state = sync_rolling_states(df, index_df, windows=(20,), snapshot_dir=str(tmp_path))[20]
+    pd.testing.assert_frame_equal(state.against_index(min_periods=2), expected, check_names=False)
@@ -0,0 +1,15 @@
+import pandas as pd
+
+from symbol_index import SymbolIndex, symbol_rows
+
+
+def test_selected_rows_keep_only_their_categories():
+    df = pd.DataFrame({
+        'Symbol': pd.Categorical(['AAA', 'AAA', 'BBB', 'CCC']),
+        'Date': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-01', '2024-01-01']),
+        'ClosePrice': [1.0, 2.0, 3.0, 4.0],
+    })
+    for index in (None, SymbolIndex(df)):
+        rows = symbol_rows(df, ['AAA', 'CCC'], index)
+        assert list(rows['Symbol'].cat.categories) == ['AAA', 'CCC']
+        assert len(rows) == 3
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from indicators import TREND_MA, compute_indicators
+from stock_future_trend import detect_trend
+from symbol_index import SymbolIndex
+from trend_screener import screen_trends
+
+
+def test_short_history_matches_detect_trend():
+    dates = pd.bdate_range('2024-01-01', periods=150)
+    df = pd.concat([
+        pd.DataFrame({'Symbol': 'LONG', 'Date': dates, 'ClosePrice': np.linspace(100, 200, 150)}),
+        pd.DataFrame({'Symbol': 'SHORT', 'Date': dates[-30:], 'ClosePrice': np.linspace(100, 90, 30)}),
+    ], ignore_index=True)
+    for col in ('HighPrice', 'LowPrice', 'VWAP'):
+        df[col] = df['ClosePrice']
+    symbol_index = SymbolIndex(df)
+    indicators = compute_indicators(symbol_index=symbol_index)
+
+    screener = screen_trends(symbol_index=symbol_index, indicators=indicators).set_index('Symbol')
+    rows = SymbolIndex(indicators)
+    for symbol in ('LONG', 'SHORT'):
+        assert screener.loc[symbol, 'MA Signal'] == detect_trend(rows.get(symbol), ma_column=TREND_MA)
+    assert screener.loc['SHORT', 'MA Signal'] == "⏳ Not enough history"
+    assert screener.loc['LONG', 'MA Signal'] == "📈 Bullish"
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+from symbol_index import SymbolIndex
+from indicators import RSI_WINDOW, TREND_MA
+
+SLOPE_WINDOW = 30
+
+
+def last_window_positions(symbol_index, window):
+    # Row positions of each symbol's last `window` rows, oldest first, and which of
+    # them exist (shorter histories are left-padded)
+    starts, ends = symbol_index.starts, symbol_index.ends
+    positions = ends[:, None] - window + np.arange(window)[None, :]
+    valid = positions >= starts[:, None]
+    return np.clip(positions, 0, None), valid
+
+
+def last_window_matrix(symbol_index, column, window):
+    # symbol x window matrix of each symbol's last `window` values, NaN where padded
+    values = symbol_index.frame[column].to_numpy(dtype=np.float64)
+    if len(values) == 0:
+        return np.empty((0, window))
+    positions, valid = last_window_positions(symbol_index, window)
+    return np.where(valid, values[positions], np.nan)
+
+
+def ols_slopes(matrix):
+    # Closed-form least-squares slope of each row against its position, skipping NaNs
+    x = np.broadcast_to(np.arange(matrix.shape[1], dtype=np.float64), matrix.shape)
+    valid = ~np.isnan(matrix)
+    n = valid.sum(axis=1)
+    x = np.where(valid, x, 0)
+    y = np.where(valid, matrix, 0)
+
+    sx, sy = x.sum(axis=1), y.sum(axis=1)
+    sxx, sxy = (x * x).sum(axis=1), (x * y).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes = (n * sxy - sx * sy) / (n * sxx - sx ** 2)
+    # A single point (or none) has no trend
+    return np.where(n >= 2, slopes, 0.0)
+
+
+def _direction(values, up, down, flat):
+    return np.select([values > 0, values < 0], [up, down], flat)
+
+
+def screen_trends(df=None, symbol_index=None, window=SLOPE_WINDOW, indicators=None):
+    # indicators: compute_indicators output in the same row order; its moving average
+    # replaces the vendor's median-filled 120Days column
+    if symbol_index is None:
+        symbol_index = SymbolIndex(df)
+    frame = symbol_index.frame
+
+    closes = last_window_matrix(symbol_index, 'ClosePrice', window)
+    slopes = ols_slopes(closes)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normalized = slopes / np.nanmean(closes, axis=1) * 100
+
+    last_rows = symbol_index.ends - 1
+    latest_close = frame['ClosePrice'].to_numpy(dtype=np.float64)[last_rows]
+    ma_column = '120Days' if indicators is None else TREND_MA
+    latest_ma = (frame if indicators is None else indicators)[ma_column].to_numpy(dtype=np.float64)[last_rows]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ma_gap = (latest_close / latest_ma - 1) * 100
+
+    screener = pd.DataFrame({
+        'Symbol': symbol_index.symbols,
+        'Date': frame['Date'].to_numpy()[last_rows],
+        'ClosePrice': latest_close,
+        'Slope': slopes,
+        'Slope %/day': normalized,
+        'Slope Trend': _direction(slopes, "📈 Uptrend", "📉 Downtrend", "⚖️ Sideways"),
+        ma_column: latest_ma,
+        'MA Gap %': ma_gap,
+        # Same label detect_trend gives before the moving average has a full window
+        'MA Signal': np.where(np.isnan(latest_ma), "⏳ Not enough history",
+                              _direction(latest_close - latest_ma, "📈 Bullish", "📉 Bearish", "⚖️ Neutral")),
+        'Days': (~np.isnan(closes)).sum(axis=1),
+    })
+    if indicators is not None:
+        rsi = f'RSI{RSI_WINDOW}'
+        screener[rsi] = indicators[rsi].to_numpy(dtype=np.float64)[last_rows]
+    return screener
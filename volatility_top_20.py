@@ -1,17 +1,18 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
-def calculate_volatility_plot(df, top_n=20):
-    df['Volatility'] = df['HighPrice'] - df['LowPrice']
+def calculate_volatility_plot(df, top_n=20, features=None):
+    # Average volatility per symbol, read from the feature table when available
+    if features is not None:
+        volatility_by_symbol = features.set_index('Symbol')['VolatilityMean']
+    else:
+        # Never written back: the frame may be the shared read-only dataset
+        volatility = df['Volatility'] if 'Volatility' in df.columns else df['HighPrice'] - df['LowPrice']
+        volatility_by_symbol = volatility.groupby(df['Symbol'], observed=True).mean()
 
-    # Group by symbol and calculate average volatility
-    volatility_by_symbol = (
-        df.groupby('Symbol')['Volatility']
-        .mean()
-        .sort_values(ascending=False)
-        .head(top_n)
-    )
+    volatility_by_symbol = volatility_by_symbol.sort_values(ascending=False).head(top_n)
 
-    fig, ax = plt.subplots(figsize=(10, 5))
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
     volatility_by_symbol.plot(kind='bar', ax=ax, color='skyblue', title='Average Volatility of Top 20 Symbols')
     ax.set_ylabel('Average Daily Volatility')
     ax.grid(True)